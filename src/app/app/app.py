@@ -11,33 +11,63 @@
 # float dtype. Also guards against divide-by-zero/inf and keeps Int64 (nullable).
 
 from pathlib import Path
-from typing import Dict, Optional, Tuple, List, Callable
+from typing import Any, Dict, Optional, Tuple, List, Callable
 from datetime import time as dtime
 
 import numpy as np
 import pandas as pd
 import streamlit as st
 from io import BytesIO
+import hashlib
 
 from plotly.subplots import make_subplots
 import plotly.graph_objects as go
 
 # ---- Dynamic DB engine: Render/Postgres, Supabase, or SQLite --------------
 import os
-from sqlalchemy import create_engine, inspect
+import re
+import threading
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.engine import URL
+from sqlalchemy.pool import StaticPool
 import sqlite3
 
 # Default DB: live next to this app, under ./database/lynkwell_data.db
 APP_DIR = Path(__file__).resolve().parent
 DEFAULT_SQLITE_PATH = APP_DIR / "database" / "lynkwell_data.db"
 
+# Per-connection SQLite tuning for the read-heavy viewer: mmap'd reads, a 64 MB page
+# cache and in-memory temp b-trees for ORDER BY. query_only is added for read helpers.
+_SQLITE_PRAGMAS: Tuple[str, ...] = (
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA temp_store=MEMORY",
+)
+
+def _apply_sqlite_pragmas(con, read_only: bool = False) -> None:
+    """Run the tuning PRAGMAs on a DB-API connection (sqlite3 or ADBC)."""
+    cur = con.cursor()
+    try:
+        for pragma in _SQLITE_PRAGMAS + (("PRAGMA query_only=1",) if read_only else ()):
+            cur.execute(pragma)
+    finally:
+        cur.close()
+
+def _sqlite_connect(path: str, read_only: bool = True) -> sqlite3.Connection:
+    """sqlite3.connect with the tuning PRAGMAs applied; read-only unless asked otherwise."""
+    con = sqlite3.connect(path)
+    _apply_sqlite_pragmas(con, read_only=read_only)
+    return con
+
+@st.cache_resource(show_spinner=False)
 def get_engine(db_path: str):
     """Return a SQLAlchemy engine, preferring the Render Postgres URL if available.
     Priority:
       1. RENDER_DB_URL or DATABASE_URL (Render-hosted Postgres)
       2. local SQLite file at `db_path`
     Supabase is intentionally not used anymore.
+    Cached per path so every query reuses one engine/pool; the SQLite engine
+    shares a single connection across Streamlit's script threads.
     """
     render_db_url = os.environ.get("RENDER_DB_URL") or os.environ.get("DATABASE_URL")
     if render_db_url:
@@ -45,8 +75,136 @@ def get_engine(db_path: str):
             return create_engine(render_db_url)
         except Exception as e:
             print(f"[db] failed to connect to Render Postgres, falling back to SQLite: {e}")
+    ensure_range_indexes(str(db_path))
     sqlite_url = URL.create("sqlite", database=str(db_path))
-    return create_engine(sqlite_url)
+    engine = create_engine(
+        sqlite_url,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    # Not query_only: the error-code import writes through this engine
+    event.listen(engine, "connect", lambda dbapi_con, _rec: _apply_sqlite_pragmas(dbapi_con))
+    return engine
+
+# Range-scan indexes backing read_range's (station_id, timestamp) filters.
+# Names match the ones the ingest scripts create so IF NOT EXISTS is a no-op there.
+_ENSURE_INDEXES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "realtime_meter_values": ("idx_rm_station_ts", ("station_id", "timestamp")),
+    "realtime_status_notifications": ("idx_rs_station_ts", ("station_id", "timestamp")),
+    "realtime_authorize": ("idx_ra_station_ts", ("station_id", "timestamp")),
+    "realtime_websocket": ("idx_rw_station_ts", ("station_id", "timestamp")),
+}
+
+@st.cache_resource(show_spinner=False)
+def ensure_range_indexes(db_file: str) -> None:
+    """Create the read_range indexes once per process for a local SQLite file, and switch
+    it to WAL so the viewer's reads don't block on (or get blocked by) ingest writes.
+    """
+    if not Path(db_file).exists():
+        return
+    try:
+        with _sqlite_connect(db_file, read_only=False) as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            existing = {r[0] for r in con.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+            for table, (idx_name, cols) in _ENSURE_INDEXES.items():
+                if table in existing:
+                    con.execute(f"CREATE INDEX IF NOT EXISTS {idx_name} ON {table}({', '.join(cols)})")
+    except Exception as e:
+        print(f"[db] could not ensure range indexes on {db_file}: {e}")
+
+# ---- Optional: ADBC (Arrow-native) readers ---------------------------------
+# Decodes query results in C straight into Arrow buffers instead of building
+# Python row objects through SQLAlchemy. Falls back to pd.read_sql if missing.
+try:
+    import adbc_driver_sqlite.dbapi as adbc_sqlite
+    ADBC_SQLITE_AVAILABLE = True
+except Exception:
+    ADBC_SQLITE_AVAILABLE = False
+try:
+    import adbc_driver_postgresql.dbapi as adbc_postgresql
+    ADBC_POSTGRES_AVAILABLE = True
+except Exception:
+    ADBC_POSTGRES_AVAILABLE = False
+
+_NAMED_PARAM_RE = re.compile(r"(?<!:):([A-Za-z_]\w*)")
+# Window-bound parameters: bound as ISO text, so Postgres needs an explicit timestamptz cast
+# (SQLite compares the TEXT column directly)
+_TIMESTAMP_PARAMS = frozenset({"start", "end"})
+
+@st.cache_resource(show_spinner=False)
+def get_adbc_connection(db_path: str):
+    """Return (ADBC connection, placeholder style, lock) using the same priority as
+    get_engine, or (None, None, None) when the matching ADBC driver isn't installed.
+    Cached per path like get_engine; the lock serializes cursors across script threads.
+    autocommit=True: with ADBC's default the first SELECT opens a read transaction that is
+    never closed, pinning every later read to that snapshot (and blocking WAL checkpoints).
+    """
+    render_db_url = os.environ.get("RENDER_DB_URL") or os.environ.get("DATABASE_URL")
+    if render_db_url:
+        if ADBC_POSTGRES_AVAILABLE:
+            return adbc_postgresql.connect(render_db_url, autocommit=True), "numeric", threading.Lock()
+        return None, None, None
+    if ADBC_SQLITE_AVAILABLE:
+        con = adbc_sqlite.connect(str(db_path), autocommit=True)
+        _apply_sqlite_pragmas(con, read_only=True)
+        return con, "qmark", threading.Lock()
+    return None, None, None
+
+@st.cache_resource(show_spinner=False)
+def _adbc_unsupported(db_path: str) -> set:
+    """SQL texts ADBC could not decode for this DB; they go straight to pd.read_sql.
+    (The SQLite driver types each column from its first rows, so a column mixing INTEGER
+    and REAL values, like realtime_meter_values.power_offered_w, fails mid-read.)
+    """
+    return set()
+
+def read_sql_arrow(db_file: str, sql: str, params: Optional[Dict] = None) -> Optional[pd.DataFrame]:
+    """Run a `:name`-parameterized query through ADBC and return a NumPy-backed DataFrame
+    (no ArrowDtype columns, so downstream merges/concats mix it with pd.read_sql frames).
+    Column dtypes can still differ from pd.read_sql's inference (e.g. an integer column
+    with NULLs is float64 here, object there); callers coerce what they use.
+    Returns None if ADBC isn't available or the query fails, so callers can fall back.
+    """
+    params = params or {}
+    unsupported = _adbc_unsupported(db_file)
+    if sql in unsupported:
+        return None
+    try:
+        con, style, lock = get_adbc_connection(db_file)
+    except Exception as e:
+        print(f"[db] ADBC connect failed, falling back to pd.read_sql: {e}")
+        return None
+    if con is None:
+        return None
+    names: List[str] = []
+
+    def _placeholder(m: "re.Match") -> str:
+        names.append(m.group(1))
+        if style == "qmark":
+            return "?"
+        if m.group(1) in _TIMESTAMP_PARAMS:
+            return f"CAST(${len(names)} AS timestamptz)"
+        return f"${len(names)}"
+
+    try:
+        with lock:
+            with con.cursor() as cur:
+                cur.execute(_NAMED_PARAM_RE.sub(_placeholder, sql), [params[n] for n in names])
+                table = cur.fetch_arrow_table()
+        return table.to_pandas()
+    except Exception as e:
+        print(f"[db] ADBC query failed, falling back to pd.read_sql: {e}")
+        # Only reconnect if the connection itself is broken (e.g. dropped by the server);
+        # otherwise the query is the problem, so skip ADBC for it from now on.
+        try:
+            with lock:
+                with con.cursor() as cur:
+                    cur.execute("SELECT 1")
+                    cur.fetchall()
+            unsupported.add(sql)
+        except Exception:
+            get_adbc_connection.clear()
+        return None
 
 # ---- Optional: AgGrid for true row-click selection ------------------------
 try:
@@ -55,6 +213,110 @@ try:
 except Exception:
     AGGRID_AVAILABLE = False
 
+# ---- Optional: plotly-resampler for long meter traces ------------------------
+try:
+    from plotly_resampler import FigureResampler
+    from plotly_resampler.aggregation import MinMaxLTTB
+    RESAMPLER_AVAILABLE = True
+except Exception:
+    RESAMPLER_AVAILABLE = False
+
+# Traces longer than this are downsampled to ~RESAMPLE_POINTS before shipping to the browser
+# (MinMaxLTTB via plotly-resampler when installed, else the NumPy min/max buckets in minmax_indices)
+RESAMPLE_THRESHOLD = 5000
+RESAMPLE_POINTS = 2000
+
+def maybe_resampler(fig: go.Figure, n_points: int) -> go.Figure:
+    """Wrap `fig` in a FigureResampler when the traces are long enough to matter."""
+    if not RESAMPLER_AVAILABLE or n_points <= RESAMPLE_THRESHOLD:
+        return fig
+    return FigureResampler(
+        fig,
+        default_n_shown_samples=RESAMPLE_POINTS,
+        default_downsampler=MinMaxLTTB(parallel=True),
+        show_mean_aggregation_size=False,
+        resampled_trace_prefix_suffix=("", ""),  # keep legend names unchanged
+    )
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Positions of the min and max of each of n_out // 2 equal buckets, plus both endpoints.
+
+    NumPy stand-in for MinMaxLTTB when plotly-resampler is missing: peaks and dips survive,
+    and an all-NaN bucket keeps a NaN sample so the line still breaks there.
+    """
+    n = len(y)
+    n_buckets = max(n_out // 2, 1)
+    size = -(-n // n_buckets)  # ceil
+    pad = n_buckets * size - n
+    lo = np.concatenate([np.where(np.isnan(y), np.inf, y), np.full(pad, np.inf)]).reshape(n_buckets, size)
+    hi = np.concatenate([np.where(np.isnan(y), -np.inf, y), np.full(pad, -np.inf)]).reshape(n_buckets, size)
+    base = np.arange(n_buckets) * size
+    idx = np.concatenate([[0, n - 1], base + lo.argmin(axis=1), base + hi.argmax(axis=1)])
+    return np.unique(idx[idx < n])
+
+def add_line_trace(fig: go.Figure, trace, x, y, **kwargs) -> None:
+    """Add `trace` with data x/y; FigureResampler keeps the full series server-side."""
+    if RESAMPLER_AVAILABLE and isinstance(fig, FigureResampler):
+        # The aggregators want plain ndarrays (nullable Float64/Int64 columns are rejected)
+        hf_y = pd.Series(y).to_numpy(dtype="float64", na_value=np.nan)
+        fig.add_trace(trace, hf_x=x, hf_y=hf_y, **kwargs)
+    else:
+        if len(y) > RESAMPLE_THRESHOLD:
+            # No resampler: ship a min/max-decimated copy instead of every sample
+            y = pd.Series(y).to_numpy(dtype="float64", na_value=np.nan)
+            keep = minmax_indices(y, RESAMPLE_POINTS)
+            x, y = np.asarray(x)[keep], y[keep]
+        trace.update(x=x, y=y)
+        fig.add_trace(trace, **kwargs)
+
+# ---- Optional: numba kernels for large-frame hot loops ----------------------
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except Exception:
+    NUMBA_AVAILABLE = False
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, parallel=True)
+    def _epoch_to_ns(num, out):
+        """One pass over epoch numbers: us / ms / s -> int64 ns, NaT (min int64) otherwise.
+        The whole part is scaled in int64 (a float64 product rounds ns epochs to ~256 ns)."""
+        nat = np.int64(-(1 << 63))
+        for i in prange(num.shape[0]):
+            v = num[i]
+            if v != v:  # NaN
+                out[i] = nat
+                continue
+            if v > 1e14:
+                scale = np.int64(1_000)
+            elif v > 1e12:
+                scale = np.int64(1_000_000)
+            elif v >= 1e9:
+                scale = np.int64(1_000_000_000)
+            else:
+                out[i] = nat
+                continue
+            # Outside the datetime64[ns] range -> NaT (matches to_datetime(errors="coerce"))
+            if v * scale >= 9.2e18:
+                out[i] = nat
+                continue
+            whole = np.floor(v)
+            out[i] = np.int64(whole) * scale + np.int64(np.rint((v - whole) * scale))
+
+    @njit(cache=True)
+    def _reconnect_gaps(station, connect, disconnect, ts_ns, out):
+        """Minutes since the previous row when it is a DISCONNECT of the same station, NaN otherwise.
+        Rows are sorted by (station, time); station code -1 means a missing id.
+        """
+        nat = np.int64(-(1 << 63))
+        for i in range(station.shape[0]):
+            if (i > 0 and station[i] >= 0 and station[i] == station[i - 1]
+                    and connect[i] and disconnect[i - 1]
+                    and ts_ns[i] != nat and ts_ns[i - 1] != nat):
+                out[i] = (ts_ns[i] - ts_ns[i - 1]) / 1e9 / 60.0
+            else:
+                out[i] = np.nan
+
 # ---- Excel engine detection -------------------------------------------------
 try:
     import xlsxwriter
@@ -64,6 +326,33 @@ except Exception:
     EXCEL_ENGINE = "openpyxl"
     _XLSXWRITER_IMPORTED = None
 
+# ---- Optional: pyarrow for the columnar Main Data download ---------------------
+try:
+    import pyarrow.parquet  # noqa: F401  (pandas' to_parquet engine)
+    PARQUET_AVAILABLE = True
+except Exception:
+    PARQUET_AVAILABLE = False
+
+# Number format for every datetime cell in the export, applied as each cell is written
+EXCEL_DATETIME_FORMAT = "m/d/yy hh:mm:ss"
+EXCEL_DATE_FORMAT = "m/d/yy"
+
+def make_excel_writer(buf) -> pd.ExcelWriter:
+    """ExcelWriter on `buf` using the detected engine, with the export's datetime/date formats.
+    xlsxwriter skips its per-string URL regex scan and writes '='-prefixed values as text
+    rather than formulas. constant_memory is deliberately not enabled: pandas writes cells
+    column by column and that mode drops any cell above the current row.
+    """
+    fmt_kwargs = {"datetime_format": EXCEL_DATETIME_FORMAT, "date_format": EXCEL_DATE_FORMAT}
+    if EXCEL_ENGINE == "xlsxwriter":
+        return pd.ExcelWriter(
+            buf,
+            engine=EXCEL_ENGINE,
+            engine_kwargs={"options": {"strings_to_urls": False, "strings_to_formulas": False}},
+            **fmt_kwargs,
+        )
+    return pd.ExcelWriter(buf, engine=EXCEL_ENGINE, **fmt_kwargs)
+
 # ---- Timezone helpers (py39 safe) ------------------------------------------
 try:
     from zoneinfo import ZoneInfo
@@ -88,37 +377,139 @@ EVSE_NAME_MAP: Dict[str, str] = {
 # Dynamic EVSE map from DB (station_id -> name)
 ASSET_NAME_MAP: Dict[str, str] = {}
 
-@st.cache_data(show_spinner=False)
-def load_assets_map(db_file: str, _mtime: float) -> Dict[str, str]:
+# Keyed on the DB mtime; callers treat the returned map as read-only. Only the current
+# (and a just-replaced) mtime are worth keeping, so old maps are evicted.
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_assets_map(db_file: str, mtime: float) -> Dict[str, str]:
     if not Path(db_file).exists():
         return {}
     try:
-        with sqlite3.connect(db_file) as con:
+        with _sqlite_connect(db_file) as con:
             cur = con.cursor()
             cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='assets'")
             if not cur.fetchone():
                 return {}
-            cur.execute("SELECT asset_id, name FROM assets")
-            rows = cur.fetchall()
-            return {str(a): (str(n) if n is not None else str(a)) for a, n in rows}
+            df = pd.read_sql("SELECT asset_id, name FROM assets", con)
+        ids = df["asset_id"].astype(str)
+        names = df["name"].astype(str).where(df["name"].notna(), ids)  # NULL name -> asset id
+        return dict(zip(ids, names))
     except Exception:
         return {}
 
  # Best-friendly resolver: prefer site-friendly static names, then dynamic asset names, then raw id
+# COMBINED_MAP is the memo: rebuilt from both maps whenever ASSET_NAME_MAP is reloaded
 def friendly_evse_dynamic(sid: str) -> str:
     sid = str(sid)
-    # 1) Prefer curated site-friendly names
-    if sid in EVSE_NAME_MAP and EVSE_NAME_MAP[sid]:
-        return EVSE_NAME_MAP[sid]
-    # 2) Fall back to runtime asset names (may be hardware model labels)
-    if sid in ASSET_NAME_MAP and ASSET_NAME_MAP[sid]:
-        return ASSET_NAME_MAP[sid]
-    # 3) Raw id
-    return sid
+    return COMBINED_MAP.get(sid, sid)
 
 def friendly_evse(sid: str) -> str:
     return friendly_evse_dynamic(sid)
 
+def build_combined_map() -> Dict[str, str]:
+    # 1) curated site-friendly names, 2) runtime asset names (may be hardware model labels),
+    # 3) raw id (not stored). A blank name at one level falls through to the next.
+    return {
+        **{k: v for k, v in ASSET_NAME_MAP.items() if v},
+        **{k: v for k, v in EVSE_NAME_MAP.items() if v},
+    }
+
+COMBINED_MAP: Dict[str, str] = build_combined_map()
+
+@st.cache_resource(show_spinner=False)
+def _name_to_id(static: Tuple[Tuple[str, str], ...], dynamic: Tuple[Tuple[str, str], ...]) -> Dict[str, str]:
+    """Invert the (id, name) pairs into name -> id; dynamic names override static ones."""
+    return {**{v: k for k, v in static}, **{v: k for k, v in dynamic}}
+
+def friendly_series(s: pd.Series) -> pd.Series:
+    """Vectorized friendly_evse_dynamic over a Series of station ids.
+    Resolves each distinct id once (station cardinality is tiny) and broadcasts by code.
+    """
+    codes, uniques = pd.factorize(s, use_na_sentinel=False)
+    sid = pd.Series(uniques, dtype=object).astype(str)
+    names = sid.map(COMBINED_MAP).fillna(sid).to_numpy(dtype=object)
+    return pd.Series(names.take(codes), index=s.index, dtype=object)
+
+def station_in(s: pd.Series, ids, *more_ids) -> pd.Series:
+    """Same mask as s.astype(str).isin(ids) (AND-ed with isin for each of more_ids),
+    casting each distinct station id once; stacked filters share one factorize and one mask.
+    """
+    id_sets = (ids,) + more_ids
+    codes, uniques = pd.factorize(s)  # missing ids -> code -1
+    u = pd.Series(uniques, dtype=object).astype(str)
+    keep = np.ones(len(u), dtype=bool)
+    for id_set in id_sets:
+        keep &= u.isin(id_set).to_numpy()
+    mask = np.append(keep, False)[codes]
+    na = codes < 0
+    na_names = {"nan", "None", "NaT", "<NA>"}
+    if na.any() and all(not na_names.isdisjoint(id_set) for id_set in id_sets):
+        # factorize folds None/NaN together; only then do their str() forms matter
+        na_str = s[na].astype(str)
+        na_keep = np.ones(len(na_str), dtype=bool)
+        for id_set in id_sets:
+            na_keep &= na_str.isin(id_set).to_numpy()
+        mask[na] = na_keep
+    return pd.Series(mask, index=s.index)
+
+def vendor_code_keys(s: pd.Series) -> pd.Series:
+    r"""First digit run of each value's str() ('' if none), like astype(str).str.extract(r"(\d+)").fillna("").
+    Vendor codes repeat heavily, so the regex runs once per distinct value.
+    """
+    codes, uniques = pd.factorize(s, use_na_sentinel=False)
+    keys = pd.Series(uniques, dtype=object).astype(str).str.extract(r"(\d+)", expand=False).fillna("")
+    return pd.Series(keys.to_numpy(dtype=object)[codes], index=s.index, dtype=object)
+
+def session_mask(s: pd.Series, txn: str) -> pd.Series:
+    """Rows of `s` whose string form equals `txn` (same as s.astype(str) == txn).
+    Integer columns compare as int64 and all-string columns directly; only mixed
+    object columns pay for the per-row str() cast.
+    """
+    txn = str(txn)
+    if pd.api.types.is_integer_dtype(s.dtype):
+        try:
+            num = int(txn)
+        except ValueError:
+            num = None
+        if num is None or str(num) != txn:
+            return pd.Series(False, index=s.index)
+        return pd.Series(s.to_numpy() == num, index=s.index)
+    if txn not in ("nan", "None", "NaT", "<NA>") and pd.api.types.infer_dtype(s, skipna=True) in ("string", "empty"):
+        return s == txn
+    return s.astype(str) == txn
+
+# ---- Session zoom window -------------------------------------------------------
+_ZOOM_PAD = pd.Timedelta(minutes=10)
+
+def zoom_range(start: object, end: object) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    """Plot x-range around a session: start/end padded by 10 minutes (NaT if unparseable).
+    The row values are already tz-aware Timestamps, so the parse is skipped for them and
+    the padding keeps the Anchorage tz the chart axis uses.
+    """
+    s = start if isinstance(start, pd.Timestamp) else pd.to_datetime(start, errors="coerce")
+    e = end if isinstance(end, pd.Timestamp) else pd.to_datetime(end, errors="coerce")
+    return s - _ZOOM_PAD, e + _ZOOM_PAD
+
+# ---- Heatmap cell labels: string lookups instead of per-cell str() -----------
+_INT_STRS = np.array([str(i) for i in range(1000)], dtype=object)
+
+def _int_strs(vals: np.ndarray) -> np.ndarray:
+    """Non-negative ints -> their decimal strings (table lookup below 1000)."""
+    if vals.size and vals.max() >= len(_INT_STRS):
+        return vals.astype(str).astype(object)
+    return _INT_STRS[vals]
+
+def count_labels(vals: np.ndarray) -> np.ndarray:
+    """Integer grid -> label grid, blank where zero (same text as str())."""
+    vals = np.asarray(vals, dtype="int64")
+    return np.where(vals == 0, "", _int_strs(vals.clip(0)))
+
+def tenths_labels(z: np.ndarray) -> np.ndarray:
+    """Float grid -> one-decimal labels like str(np.round(z, 1)), blank where <= 0."""
+    z = np.asarray(z, dtype="float64")
+    pos = z > 0.0
+    q = np.rint(np.where(pos, z, 0.0) * 10).astype("int64")
+    return np.where(pos, _int_strs(q // 10) + "." + _INT_STRS[q % 10], "")
+
 # ---- Connector type map (by friendly site name) -----------------------------
 CONNECTOR_TYPE_MAP: Dict[str, Dict[int, str]] = {
     "Delta - Left":  {1: "CHAdeMO", 2: "CCS"},
@@ -139,6 +530,31 @@ def connector_type_for(site_name: str, connector_id: Optional[object]) -> str:
     site_map = CONNECTOR_TYPE_MAP.get(str(site_name), {})
     return site_map.get(cid, "")
 
+# connector number -> {site name: connector type}, for the vectorized lookup below
+_CONNECTOR_TYPE_BY_NUM: Dict[int, Dict[str, str]] = {
+    num: {site: types[num] for site, types in CONNECTOR_TYPE_MAP.items() if num in types}
+    for num in sorted({n for types in CONNECTOR_TYPE_MAP.values() for n in types})
+}
+
+def connector_type_series(site_names: pd.Series, connector_ids: pd.Series) -> pd.Series:
+    """Vectorized connector_type_for over aligned site-name / connector-id Series."""
+    site = site_names.astype(str)
+    cid = np.trunc(pd.to_numeric(connector_ids, errors="coerce").to_numpy(dtype="float64"))
+    conds = [cid == num for num in _CONNECTOR_TYPE_BY_NUM]
+    choices = [site.map(types).fillna("").to_numpy(dtype=object) for types in _CONNECTOR_TYPE_BY_NUM.values()]
+    return pd.Series(np.select(conds, choices, default=""), index=site_names.index, dtype="object")
+
+# transaction_id spellings that mean "no session" once stringified
+_BAD_TXN = frozenset({"", "None", "none", "NaN", "nan", "NULL", "null"})
+
+_VID_PREFIX_RE = re.compile(r"^vid:", re.IGNORECASE)
+
+def normalize_vid_series(s: pd.Series) -> pd.Series:
+    """Vectorized 'VID:<value>' normalization; blank for missing/empty values."""
+    txt = s.astype(object).where(s.notna(), "").astype(str).str.strip()
+    out = "VID:" + txt.str.replace(_VID_PREFIX_RE, "", n=1, regex=True)
+    return out.where(txt.str.len() > 0, "").astype(object)
+
 # ---- Tritium error-code platform mapping (by friendly site name) ----------
 # Used to decide which error dictionary to use when enriching status rows.
 # Delta sites use RT50 codes; ARG sites use RTM codes.
@@ -150,6 +566,12 @@ PLATFORM_MAP: Dict[str, str] = {
     # Sites without Tritium (e.g., Glennallen ABB Terra184) intentionally omitted
 }
 
+def platform_series(names: pd.Series) -> pd.Series:
+    """names.map(PLATFORM_MAP).fillna(""), looked up once per distinct EVSE name."""
+    codes, uniques = pd.factorize(names, use_na_sentinel=False)
+    plats = pd.Series(uniques, dtype=object).map(PLATFORM_MAP).fillna("").to_numpy(dtype=object)
+    return pd.Series(plats[codes], index=names.index, dtype=object)
+
 # ---- Paths / default DB -----------------------------------------------------
 # Make paths relative to THIS file so it works the same on Mac and on Render.
 BASE = Path(__file__).resolve().parent
@@ -159,16 +581,22 @@ LOGO_PATH = BASE / "ReCharge Logo_REVA.png"
 
 # ---- DB cache-buster: use DB file mtime to invalidate caches -------------
 def _db_mtime(path: str) -> float:
-    try:
-        return float(Path(path).stat().st_mtime)
-    except Exception:
-        return 0.0
+    """Newest mtime of the SQLite file and its -wal sidecar (0.0 if missing).
+    In WAL mode a commit only appends to the -wal file; the .db itself changes at checkpoint.
+    """
+    mtimes = []
+    for p in (Path(path), Path(f"{path}-wal")):
+        try:
+            mtimes.append(float(p.stat().st_mtime))
+        except Exception:
+            pass
+    return max(mtimes, default=0.0)
 
 # ---- Streamlit config & session keys ---------------------------------------
 st.set_page_config(page_title="ReCharge Alaska — LynkWell Viewer", layout="wide")
 # ---- Tab styling: rectangular buttons, bold active, even spacing -----------
-st.markdown(
-    """
+# Kept as a module constant; emit_css() re-emits it each rerun (Streamlit drops elements a rerun doesn't re-emit)
+_CSS = """
     <style>
     /* space tabs evenly across the header row */
     .stTabs [data-baseweb="tab-list"] {
@@ -258,9 +686,12 @@ st.markdown(
         white-space: nowrap;
     }
     </style>
-    """,
-    unsafe_allow_html=True,
-)
+    """
+
+def emit_css() -> None:
+    st.markdown(_CSS, unsafe_allow_html=True)
+
+emit_css()
 if "status_df_key" not in st.session_state:
     st.session_state["status_df_key"] = 0
 if "meter_plot_counter" not in st.session_state:
@@ -278,9 +709,13 @@ with st.sidebar:
     else:
         st.caption(f"❌ DB NOT FOUND at: {db_path}")
 
+    # DB mtime for this rerun; every cache key below reuses it instead of re-stat'ing the file
+    db_mtime = _db_mtime(db_path)
+
     # Load names from DB assets table and build combined list for dropdown
-    ASSET_NAME_MAP = load_assets_map(db_path, _db_mtime(db_path))
+    ASSET_NAME_MAP = load_assets_map(db_path, db_mtime)
     ALL_NAME_MAP = {**EVSE_NAME_MAP, **ASSET_NAME_MAP}
+    COMBINED_MAP = build_combined_map()
 
     # some render DBs bring in short 4-char codes (e.g. "00F5", "3RT9") that we don't want
     def _looks_like_temp_name(name: str) -> bool:
@@ -317,7 +752,7 @@ with st.sidebar:
     )
 
     # Build name→id maps (dynamic overrides static if both exist)
-    NAME_TO_ID = {**{v: k for k, v in EVSE_NAME_MAP.items()}, **{v: k for k, v in ASSET_NAME_MAP.items()}}
+    NAME_TO_ID = _name_to_id(tuple(EVSE_NAME_MAP.items()), tuple(ASSET_NAME_MAP.items()))
     selected_evse_ids = [NAME_TO_ID[n] for n in evse_picks if n in NAME_TO_ID]
 
     # Fleet filter no longer needed — show everything by default
@@ -344,8 +779,10 @@ def akdt_range_to_utc_iso(start_date, start_hour, end_date, end_hour) -> Tuple[s
 start_utc_iso, end_utc_iso = akdt_range_to_utc_iso(start_date, start_hour, end_date, end_hour)
 
 # ---- DB helpers -------------------------------------------------------------
-def table_list(db_file: str, _mtime: float) -> List[str]:
-    """Return current table names for the active DB file."""
+@st.cache_data(show_spinner=False, ttl=60)
+def table_list(db_file: str, mtime: float) -> List[str]:
+    """Return current table names for the active DB file.
+    `mtime` is hashed into the key, so a table created by an ingest shows up on the next rerun."""
     try:
         engine = get_engine(db_file)
         insp = inspect(engine)
@@ -355,14 +792,76 @@ def table_list(db_file: str, _mtime: float) -> List[str]:
         return []
 
 @st.cache_data(show_spinner=False)
-def read_range(db_file: str, table: str, start_iso: str, end_iso: str, evse_id: Optional[str], _mtime: float) -> pd.DataFrame:
+def table_columns(db_file: str, table: str, _mtime: float) -> List[str]:
+    """Return column names for `table` (empty list if it can't be inspected)."""
+    try:
+        engine = get_engine(db_file)
+        return [c["name"] for c in inspect(engine).get_columns(table)]
+    except Exception:
+        return []
+
+@st.cache_data(show_spinner=False, ttl=60, max_entries=64)
+def _table_ts_bounds(db_file: str, table: str, mtime: float) -> Tuple[object, object]:
+    """(MIN, MAX) of `table`.timestamp for the current DB mtime, or (None, None) if unknown.
+    Only text bounds are used to skip queries (ISO strings compare like SQLite TEXT).
+    Bounded, and ttl'd because Postgres has no file mtime to invalidate it.
+    """
+    try:
+        with get_engine(db_file).connect() as con:
+            row = con.execute(text(f"SELECT MIN(timestamp), MAX(timestamp) FROM {table}")).fetchone()
+        return (row[0], row[1]) if row else (None, None)
+    except Exception:
+        return (None, None)
+
+@st.cache_data(show_spinner=False, ttl=60)
+def table_stats(db_file: str, tables: Tuple[str, ...], mtime: float) -> List[Tuple[str, object, object, object]]:
+    """(table, COUNT(*), MIN(timestamp), MAX(timestamp)) for each of `tables` in one UNION ALL.
+    Tables without a timestamp column are skipped; [] if the query fails.
+    """
+    present = [t for t in tables if "timestamp" in {c.lower() for c in table_columns(db_file, t, mtime)}]
+    if not present:
+        return []
+    sql = " UNION ALL ".join(
+        f"SELECT '{t}' AS tbl, COUNT(*) AS c, MIN(timestamp) AS mn, MAX(timestamp) AS mx FROM {t}"
+        for t in present
+    )
+    try:
+        with get_engine(db_file).connect() as con:
+            return [tuple(r) for r in con.execute(text(sql)).fetchall()]
+    except Exception:
+        return []
+
+# Windowed loaders take `mtime`, not `_mtime`, so a SQLite write (DB or WAL mtime) is part of
+# the key. They are memory-only with a ttl: Postgres has no file mtime (it stays 0.0), and a
+# disk-persisted cache would ignore the ttl and serve stale rows indefinitely.
+@st.cache_data(show_spinner=False, ttl=300, max_entries=64)
+def read_range(db_file: str, table: str, start_iso: str, end_iso: str, evse_id: Optional[str], mtime: float,
+               cols: Optional[Tuple[str, ...]] = None) -> pd.DataFrame:
+    """Read rows of `table` in [start_iso, end_iso], optionally for a single station.
+    `cols` limits the SELECT to those columns (matched case-insensitively; ones the
+    table lacks are skipped); leave it None for callers that export every column.
+    """
     engine = get_engine(db_file)
     where = ["timestamp >= :start AND timestamp <= :end"]
     params: Dict = {"start": start_iso, "end": end_iso}
     if evse_id:
         where.append("station_id = :evse_id")
         params["evse_id"] = evse_id
-    sql = f"SELECT * FROM {table} WHERE {' AND '.join(where)} ORDER BY timestamp ASC"
+    select = "*"
+    picked: List[str] = []
+    if cols:
+        present = {c.lower(): c for c in table_columns(db_file, table, mtime)}
+        picked = [present[c.lower()] for c in cols if c.lower() in present]
+        if picked:
+            select = ", ".join(picked)
+    # Window entirely outside the table's data: same empty result, without the range scan
+    lo, hi = _table_ts_bounds(db_file, table, mtime)
+    if isinstance(lo, str) and isinstance(hi, str) and (start_iso > hi or end_iso < lo):
+        return pd.DataFrame(columns=picked or table_columns(db_file, table, mtime))
+    sql = f"SELECT {select} FROM {table} WHERE {' AND '.join(where)} ORDER BY timestamp ASC"
+    df = read_sql_arrow(db_file, sql, params)
+    if df is not None:
+        return df
     try:
         df = pd.read_sql(sql, engine, params=params)
     except Exception:
@@ -370,8 +869,25 @@ def read_range(db_file: str, table: str, start_iso: str, end_iso: str, evse_id:
     return df
 
 # ---- Helper: Load and normalize CEA OCPP samples to meter schema ----
-@st.cache_data(show_spinner=False)
-def read_cea_samples(db_file: str, start_iso: str, end_iso: str, _mtime: float) -> pd.DataFrame:
+# cea_ocpp_samples column -> canonical meter column
+CEA_METRIC_COLUMNS: Dict[str, str] = {
+    "power_import_w": "power_w",
+    "energy_import_wh": "energy_wh",
+    "soc_percent": "soc",
+    "current_import_a": "amperage_import",
+    "current_offered_a": "offered_current_a",
+    "requested_current_a": "requested_current_a",
+    "voltage_v": "hvb_volts",
+}
+
+def _as_numeric(s: pd.Series) -> pd.Series:
+    """Coerce to numeric, skipping the object-walking to_numeric when the driver already typed it."""
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        return s
+    return pd.to_numeric(s, errors="coerce")
+
+@st.cache_data(show_spinner=False, ttl=300, max_entries=16)
+def read_cea_samples(db_file: str, start_iso: str, end_iso: str, mtime: float) -> pd.DataFrame:
     """
     Load CEA OCPP samples and normalize columns so they blend into the main meter
     pipeline. Expected table: `cea_ocpp_samples` with at least:
@@ -386,19 +902,19 @@ def read_cea_samples(db_file: str, start_iso: str, end_iso: str, _mtime: float)
       amperage_import, offered_current_a, hvb_volts
     """
     engine = get_engine(db_file)
-    try:
-        df = pd.read_sql(
-            """
-            SELECT *
-            FROM cea_ocpp_samples
-            WHERE timestamp_utc >= :start AND timestamp_utc <= :end
-            ORDER BY timestamp_utc ASC
-            """,
-            engine,
-            params={"start": start_iso, "end": end_iso},
-        )
-    except Exception:
-        return pd.DataFrame()
+    sql = """
+        SELECT *
+        FROM cea_ocpp_samples
+        WHERE timestamp_utc >= :start AND timestamp_utc <= :end
+        ORDER BY timestamp_utc ASC
+        """
+    params = {"start": start_iso, "end": end_iso}
+    df = read_sql_arrow(db_file, sql, params)
+    if df is None:
+        try:
+            df = pd.read_sql(sql, engine, params=params)
+        except Exception:
+            return pd.DataFrame()
 
     if df is None or df.empty:
         return pd.DataFrame()
@@ -406,9 +922,8 @@ def read_cea_samples(db_file: str, start_iso: str, end_iso: str, _mtime: float)
     out = pd.DataFrame()
     # Timestamp: normalize to the canonical column name used elsewhere
     if "timestamp_utc" in df.columns:
-        out["timestamp"] = pd.to_datetime(df["timestamp_utc"], errors="coerce", utc=True).dt.strftime("%Y-%m-%dT%H:%M:%S%z")
-        # Ensure a clean Z form (optional cosmetic)
-        out["timestamp"] = out["timestamp"].str.replace(r"\+0000$", "+00:00", regex=True)
+        # Keep as datetime64[ns, UTC]; add_akdt uses it directly instead of re-parsing strings
+        out["timestamp"] = pd.to_datetime(df["timestamp_utc"], errors="coerce", utc=True)
     elif "timestamp" in df.columns:
         out["timestamp"] = df["timestamp"].astype(str)
     else:
@@ -422,7 +937,7 @@ def read_cea_samples(db_file: str, start_iso: str, end_iso: str, _mtime: float)
         out["station_id"] = "CEA"
 
     if "connector_id" in df.columns:
-        out["connector_id"] = pd.to_numeric(df["connector_id"], errors="coerce")
+        out["connector_id"] = _as_numeric(df["connector_id"])
 
     # Transaction/session identity (needed for session summaries)
     if "transaction_id" in df.columns:
@@ -431,20 +946,9 @@ def read_cea_samples(db_file: str, start_iso: str, end_iso: str, _mtime: float)
         out["transaction_id"] = df["session_id"].astype(str)
 
     # Metric mappings (defensive if missing)
-    if "power_import_w" in df.columns:
-        out["power_w"] = pd.to_numeric(df["power_import_w"], errors="coerce")
-    if "energy_import_wh" in df.columns:
-        out["energy_wh"] = pd.to_numeric(df["energy_import_wh"], errors="coerce")
-    if "soc_percent" in df.columns:
-        out["soc"] = pd.to_numeric(df["soc_percent"], errors="coerce")
-    if "current_import_a" in df.columns:
-        out["amperage_import"] = pd.to_numeric(df["current_import_a"], errors="coerce")
-    if "current_offered_a" in df.columns:
-        out["offered_current_a"] = pd.to_numeric(df["current_offered_a"], errors="coerce")
-    if "requested_current_a" in df.columns:
-        out["requested_current_a"] = pd.to_numeric(df["requested_current_a"], errors="coerce")
-    if "voltage_v" in df.columns:
-        out["hvb_volts"] = pd.to_numeric(df["voltage_v"], errors="coerce")
+    for src_col, dst_col in CEA_METRIC_COLUMNS.items():
+        if src_col in df.columns:
+            out[dst_col] = _as_numeric(df[src_col])
 
     # Carry optional action/type/source if present (won’t affect plotting)
     for extra in ["action", "type", "source", "protocol"]:
@@ -453,74 +957,97 @@ def read_cea_samples(db_file: str, start_iso: str, end_iso: str, _mtime: float)
 
     # Tag EVSE name later via add_evse_name_col; return normalized
     return out
-def _candidate_tables(avail: List[str], include_terms: List[str], exclude_terms: List[str] = None) -> List[str]:
+def _candidate_tables(avail_lc: Dict[str, str], include_terms: List[str], exclude_terms: List[str] = None) -> List[str]:
+    """Pick tables whose lower-cased name has all include terms and no exclude terms.
+    `avail_lc` maps table name -> lower-cased name (built once per caller).
+    """
     exclude_terms = exclude_terms or []
     out = []
-    for t in avail:
-        tl = t.lower()
+    for t, tl in avail_lc.items():
         if all(term in tl for term in include_terms) and not any(ex in tl for ex in exclude_terms):
             out.append(t)
-    out.sort(key=lambda x: (0 if "realtime" in x.lower() else 1, x))
+    out.sort(key=lambda x: (0 if "realtime" in avail_lc[x] else 1, x))
     return out
 
-@st.cache_data(show_spinner=False)
-def load_connectivity_events(db_file: str, start_iso: str, end_iso: str, _mtime: float) -> pd.DataFrame:
-    avail = table_list(db_file, _mtime)
+# Columns the heuristic connectivity paths read: timestamp, station id variants, event variants
+_CONNECTIVITY_COLS: Tuple[str, ...] = (
+    "timestamp", "station_id", "evse_id", "asset_id", "station", "event", "action", "status",
+)
+
+# The only two labels load_connectivity_events emits; its Connectivity column is a categorical
+# over these, so code 0 is CONNECT and code 1 is DISCONNECT.
+CONNECTIVITY_EVENTS = pd.CategoricalDtype(["websocket CONNECT", "websocket DISCONNECT"])
+
+def _project_events(df: pd.DataFrame) -> pd.DataFrame:
+    """Rename station/timestamp variants and keep only timestamp, station_id, Connectivity."""
+    cols = {c.lower(): c for c in df.columns}
+    renames = {}
+    for cand in ["station_id", "evse_id", "asset_id", "station"]:
+        if cand in cols:
+            if cols[cand] != "station_id":
+                renames[cols[cand]] = "station_id"
+            break
+    for cand in ["timestamp", "time", "ts", "created_at"]:
+        if cand in cols:
+            if cols[cand] != "timestamp":
+                renames[cols[cand]] = "timestamp"
+            break
+    return df.rename(columns=renames).reindex(columns=["timestamp", "station_id", "Connectivity"])
+
+@st.cache_data(show_spinner=False, ttl=300, max_entries=64)
+def load_connectivity_events(db_file: str, start_iso: str, end_iso: str, mtime: float) -> pd.DataFrame:
+    avail = table_list(db_file, mtime)
     events = []
 
-    # --- Explicit fast path: known table 'realtime_websocket' (and archive) ---
-    for ws_table in ["realtime_websocket", "realtime_websocket_archive"]:
-        if ws_table in avail:
-            try:
-                with sqlite3.connect(db_file) as con:
-                    q = f"SELECT * FROM {ws_table} WHERE timestamp >= ? AND timestamp <= ? ORDER BY timestamp ASC"
-                    base = pd.read_sql_query(q, con, params=[start_iso, end_iso])
-                if not base.empty:
-                    # Normalize event labels to our 'Connectivity' column
-                    df_ws = base.copy()
-                    evt_lc = {c.lower(): c for c in df_ws.columns}
-                    if "event" in evt_lc:
-                        ev = df_ws[evt_lc["event"]].astype(str).str.upper()
-                        df_ws["Connectivity"] = np.where(ev.str.contains("DISCONNECT"), "websocket DISCONNECT", "websocket CONNECT")
-                    else:
-                        # If no 'event' column for some reason, skip this table
-                        df_ws = pd.DataFrame()
-                    if not df_ws.empty:
-                        events.append(df_ws)
-            except Exception:
-                pass
+    # --- Explicit fast path: known table 'realtime_websocket' (and archive), one UNION ALL read ---
+    ws_tables = [
+        t for t in ["realtime_websocket", "realtime_websocket_archive"]
+        if t in avail and "event" in {c.lower() for c in table_columns(db_file, t, mtime)}
+    ]
+    if ws_tables:
+        try:
+            q = " UNION ALL ".join(
+                f"SELECT timestamp, station_id, event FROM {t} WHERE timestamp >= ? AND timestamp <= ?"
+                for t in ws_tables
+            ) + " ORDER BY timestamp ASC"
+            with _sqlite_connect(db_file) as con:
+                df_ws = pd.read_sql_query(q, con, params=[start_iso, end_iso] * len(ws_tables))
+            if not df_ws.empty:
+                # Normalize event labels to our 'Connectivity' column
+                ev = df_ws["event"].astype(str).str.upper()
+                df_ws["Connectivity"] = np.where(ev.str.contains("DISCONNECT"), "websocket DISCONNECT", "websocket CONNECT")
+                events.append(df_ws[["timestamp", "station_id", "Connectivity"]])
+        except Exception:
+            pass
 
     # --- Heuristic paths (keep existing behavior) ---
+    avail_lc = {t: t.lower() for t in avail}
     if not events:
         # Case A: separate connect / disconnect tables
-        connect_tables = _candidate_tables(avail, ["websocket", "connect"], ["disconnect"])
-        disconnect_tables = _candidate_tables(avail, ["websocket", "disconnect"])
+        connect_tables = _candidate_tables(avail_lc, ["websocket", "connect"], ["disconnect"])
+        disconnect_tables = _candidate_tables(avail_lc, ["websocket", "disconnect"])
         # Also consider short 'ws' prefix
-        connect_tables += _candidate_tables(avail, ["ws", "connect"], ["disconnect"])
-        disconnect_tables += _candidate_tables(avail, ["ws", "disconnect"])
+        connect_tables += _candidate_tables(avail_lc, ["ws", "connect"], ["disconnect"])
+        disconnect_tables += _candidate_tables(avail_lc, ["ws", "disconnect"])
 
         for ct in connect_tables:
-            df = read_range(db_file, ct, start_iso, end_iso, None, _mtime)
+            df = read_range(db_file, ct, start_iso, end_iso, None, mtime, cols=_CONNECTIVITY_COLS)
             if not df.empty:
-                df = df.copy()
-                df["Connectivity"] = "websocket CONNECT"
-                events.append(df)
+                events.append(_project_events(df.assign(Connectivity="websocket CONNECT")))
         for dt in disconnect_tables:
-            df = read_range(db_file, dt, start_iso, end_iso, None, _mtime)
+            df = read_range(db_file, dt, start_iso, end_iso, None, mtime, cols=_CONNECTIVITY_COLS)
             if not df.empty:
-                df = df.copy()
-                df["Connectivity"] = "websocket DISCONNECT"
-                events.append(df)
+                events.append(_project_events(df.assign(Connectivity="websocket DISCONNECT")))
 
     if not events:
         # Case B: single table with an 'event'/'action'/'status' column (e.g., 'realtime_websocket' variants)
-        candidates = _candidate_tables(avail, ["websocket"]) + _candidate_tables(avail, ["ws"])
+        candidates = _candidate_tables(avail_lc, ["websocket"]) + _candidate_tables(avail_lc, ["ws"])
         seen = set()
         for t in candidates:
             if t in seen:
                 continue
             seen.add(t)
-            df = read_range(db_file, t, start_iso, end_iso, None, _mtime)
+            df = read_range(db_file, t, start_iso, end_iso, None, mtime, cols=_CONNECTIVITY_COLS)
             if df.empty:
                 continue
             cols_lc = {c.lower(): c for c in df.columns}
@@ -538,31 +1065,15 @@ def load_connectivity_events(db_file: str, start_iso: str, end_iso: str, _mtime:
                 "websocket DISCONNECT",
                 "websocket CONNECT",
             )
-            events.append(dff)
+            events.append(_project_events(dff))
 
     if not events:
         return pd.DataFrame(columns=["timestamp", "station_id", "Connectivity"])
 
-    out = pd.concat(events, ignore_index=True, sort=False)
-
-    # Normalize key columns if variants exist
-    cols = {c.lower(): c for c in out.columns}
-    # station id variants
-    for cand in ["station_id", "evse_id", "asset_id", "station"]:
-        if cand in cols:
-            if cand != "station_id":
-                out = out.rename(columns={cols[cand]: "station_id"})
-            break
-    # timestamp variants
-    for cand in ["timestamp", "time", "ts", "created_at"]:
-        if cand in cols:
-            if cand != "timestamp":
-                out = out.rename(columns={cols[cand]: "timestamp"})
-            break
-
-    # Keep only essentials
-    keep = [c for c in ["timestamp", "station_id", "Connectivity"] if c in out.columns]
-    return out[keep].copy()
+    # Every source frame is already projected to the same three columns
+    out = pd.concat(events, ignore_index=True)
+    out["Connectivity"] = out["Connectivity"].astype(CONNECTIVITY_EVENTS)
+    return out
 
 # ---- Tritium error-code dictionary helpers --------------------------------
 ERROR_TABLE = "tritium_error_codes"  # columns: platform, code, impact, description
@@ -597,9 +1108,9 @@ def ensure_error_code_table(db_file: str) -> None:
         except Exception:
             pass
 
-@st.cache_data(show_spinner=False)
-def get_error_codes_df(db_file: str, _mtime: float) -> pd.DataFrame:
-    if not error_code_table_exists(db_file, _mtime):
+@st.cache_data(show_spinner=False, ttl=300)
+def get_error_codes_df(db_file: str, mtime: float) -> pd.DataFrame:
+    if not error_code_table_exists(db_file, mtime):
         return pd.DataFrame(columns=["platform","code","impact","description"])
     engine = get_engine(db_file)
     try:
@@ -609,6 +1120,15 @@ def get_error_codes_df(db_file: str, _mtime: float) -> pd.DataFrame:
     except Exception:
         return pd.DataFrame(columns=["platform","code","impact","description"])
 
+@st.cache_data(show_spinner=False, ttl=300)
+def error_code_lookup(db_file: str, mtime: float) -> pd.DataFrame:
+    """impact/description indexed by (Platform, code_key), ready for a left join onto status rows.
+    (platform, code) is the table's primary key, so the index is unique.
+    Same ttl as get_error_codes_df, so code edits reach it on Postgres (constant mtime) too.
+    """
+    codes = get_error_codes_df(db_file, mtime).rename(columns={"platform": "Platform", "code": "code_key"})
+    return codes.drop_duplicates(["Platform", "code_key"]).set_index(["Platform", "code_key"])[["impact", "description"]]
+
 # ---- Flexible Excel sheet reader for error code import ----
 def _read_sheet_flexible(xls: pd.ExcelFile, sheet_name: str) -> pd.DataFrame:
     """
@@ -680,11 +1200,18 @@ def upsert_error_codes_from_excel(db_file: str, file_like) -> Tuple[int, int]:
             # Skip sheet if key columns missing
             continue
 
+        # Impact normalized strictly to N/L/H (anything else -> "")
+        if impact_col:
+            impact = df[impact_col].astype(str).str.strip().str.slice(0, 1).str.upper()
+            impact = impact.where(impact.isin(["N", "L", "H"]), "")
+        else:
+            impact = ""
+
         # Build normalized frame
         out = pd.DataFrame({
             "platform": platform,
             "code": df[code_col].astype(str).str.strip(),
-            "impact": (df[impact_col].astype(str).str.strip().str[0].str.upper() if impact_col else ""),
+            "impact": impact,
             "description": df[desc_col].astype(str).str.strip(),
         })
 
@@ -693,8 +1220,6 @@ def upsert_error_codes_from_excel(db_file: str, file_like) -> Tuple[int, int]:
         out = out[out["description"].astype(str).str.strip().str.lower() != "description"]
         out = out[out["code"].astype(str).str.strip() != ""]
 
-        # Normalize impact strictly to N/L/H
-        out.loc[~out["impact"].isin(["N", "L", "H"]), "impact"] = ""
         out = out.dropna(subset=["code"])
         out = out.loc[out["code"].astype(str).str.len() > 0]
 
@@ -705,91 +1230,144 @@ def upsert_error_codes_from_excel(db_file: str, file_like) -> Tuple[int, int]:
 
     all_rows = pd.concat(frames, ignore_index=True)
 
+    # One executemany for the whole import (engine-agnostic, so it also works on Render Postgres)
     engine = get_engine(db_file)
     with engine.begin() as conn:
-        for r in all_rows.itertuples(index=False):
-            conn.execute(
+        conn.execute(
+            text(
                 f"""
                 INSERT INTO {ERROR_TABLE}(platform, code, impact, description)
                 VALUES (:platform, :code, :impact, :description)
                 ON CONFLICT(platform, code) DO UPDATE SET
                   impact=excluded.impact,
                   description=excluded.description
-                """,
-                {"platform": r.platform, "code": r.code, "impact": r.impact, "description": r.description},
-            )
+                """
+            ),
+            all_rows[["platform", "code", "impact", "description"]].to_dict("records"),
+        )
 
     return (len(all_rows), total_seen)
 
 def add_akdt(df: pd.DataFrame, ts_col: str = "timestamp") -> pd.DataFrame:
     if ts_col not in df.columns:
         return df
-    out = df.copy()
+    # Shallow copy: only new/replaced columns are allocated, the caller's frame is untouched
+    out = df.copy(deep=False)
 
-    # Normalize to string and trim; normalize 'Z' to '+00:00' just in case
-    s = out[ts_col].astype(str).str.strip()
-    s = s.replace({"": np.nan, "None": np.nan})
-    s_norm = s.str.replace("Z", "+00:00", regex=False)
-
-    # First pass: ISO8601 (and anything pandas can parse) → UTC
-    out["ts_utc"] = pd.to_datetime(s_norm, utc=True, errors="coerce")
-
-    # Second pass: fix rows still NaT by trying epoch microseconds/milliseconds/seconds (numeric or numeric-strings)
-    nat = out["ts_utc"].isna()
-    if nat.any():
-        num = pd.to_numeric(out.loc[nat, ts_col], errors="coerce")
-        has_num = num.notna()
-        if has_num.any():
-            us_mask = num > 1e14
-            ms_mask = (~us_mask) & (num > 1e12)
-            s_mask  = (~us_mask) & (~ms_mask) & (num >= 1e9)
-            if us_mask.any():
-                out.loc[nat[nat].index[us_mask.values], "ts_utc"] = pd.to_datetime(num[us_mask], unit="us", utc=True, errors="coerce")
-            if ms_mask.any():
-                out.loc[nat[nat].index[ms_mask.values], "ts_utc"] = pd.to_datetime(num[ms_mask], unit="ms", utc=True, errors="coerce")
-            if s_mask.any():
-                out.loc[nat[nat].index[s_mask.values],  "ts_utc"] = pd.to_datetime(num[s_mask],  unit="s",  utc=True, errors="coerce")
-
-    # Third pass: very defensive — try parsing without utc then localize to UTC
-    nat = out["ts_utc"].isna()
-    if nat.any():
-        try:
-            tmp = pd.to_datetime(out.loc[nat, ts_col], errors="coerce")
-            # If timezone-naive, assume UTC
-            if tmp.notna().any():
-                # If tz-aware, convert; else localize to UTC
-                tzaware = pd.api.types.is_datetime64tz_dtype(tmp)
-                if tzaware:
-                    out.loc[nat, "ts_utc"] = tmp.dt.tz_convert(UTC)
-                else:
-                    out.loc[nat, "ts_utc"] = tmp.dt.tz_localize(UTC)
-        except Exception:
-            pass
+    if isinstance(out[ts_col].dtype, pd.DatetimeTZDtype):
+        # Already parsed upstream (e.g. read_cea_samples): skip the string passes
+        out["ts_utc"] = out[ts_col].dt.tz_convert(UTC)
+    else:
+        # Normalize to string and trim; normalize 'Z' to '+00:00' just in case
+        s = out[ts_col].astype(str).str.strip()
+        s = s.replace({"": np.nan, "None": np.nan})
+        s_norm = s.str.replace("Z", "+00:00", regex=False)
+
+        # First pass: ISO8601 → UTC. An explicit format takes pandas' fast ISO parser and
+        # accepts mixed precision (with/without fractional seconds) in one column; other
+        # layouts are left NaT for the fallback passes below.
+        out["ts_utc"] = pd.to_datetime(s_norm, utc=True, errors="coerce", format="ISO8601")
+
+        # Second pass: fix rows still NaT by trying epoch microseconds/milliseconds/seconds (numeric or numeric-strings)
+        nat = out["ts_utc"].isna()
+        if nat.any():
+            num = pd.to_numeric(out[ts_col].where(nat), errors="coerce").to_numpy(dtype="float64")
+            if NUMBA_AVAILABLE:
+                ns = np.empty(num.shape[0], dtype="int64")
+                _epoch_to_ns(num, ns)
+                fallback = pd.to_datetime(ns.view("datetime64[ns]"), utc=True)
+            else:
+                # One scale-to-ns factor per row (us / ms / s), 0 where not a plausible epoch.
+                # The whole part is scaled in int64 so integral epochs convert exactly (a float64
+                # product rounds ns values to ~256 ns); only a fractional remainder goes through float.
+                scale = np.select([num > 1e14, num > 1e12, num >= 1e9], [1_000, 1_000_000, 1_000_000_000], default=0)
+                ok = (scale > 0) & (num * scale < 9.2e18)  # NaN rows compare False
+                v = np.where(ok, num, 0.0)
+                whole = np.floor(v)
+                ns = whole.astype("int64") * scale + np.rint((v - whole) * scale).astype("int64")
+                ns[~ok] = np.iinfo("int64").min  # NaT
+                fallback = pd.to_datetime(ns.view("datetime64[ns]"), utc=True)
+            if fallback.notna().any():
+                out["ts_utc"] = out["ts_utc"].fillna(pd.Series(fallback, index=out.index))
+
+        # Third pass: very defensive — try parsing without utc then localize to UTC
+        nat = out["ts_utc"].isna()
+        if nat.any():
+            try:
+                tmp = pd.to_datetime(out.loc[nat, ts_col], errors="coerce")
+                # If timezone-naive, assume UTC
+                if tmp.notna().any():
+                    # If tz-aware, convert; else localize to UTC
+                    tzaware = pd.api.types.is_datetime64tz_dtype(tmp)
+                    if tzaware:
+                        out.loc[nat, "ts_utc"] = tmp.dt.tz_convert(UTC)
+                    else:
+                        out.loc[nat, "ts_utc"] = tmp.dt.tz_localize(UTC)
+            except Exception:
+                pass
 
     # AKDT timezone and a printable string for tables
     out["AKDT_dt"] = out["ts_utc"].dt.tz_convert(AK)
     # Human string used in some views (Y-m-d HH:MM:SS)
-    out["AKDT"] = out["AKDT_dt"].dt.strftime("%Y-%m-%d %H:%M:%S")
+    out["AKDT"] = local_strings(out["AKDT_dt"])
     return out
 
+def local_strings(ts: pd.Series) -> pd.Series:
+    """Format a tz-aware Series as 'YYYY-MM-DD HH:MM:SS' wall-clock strings (NaT -> NaN).
+
+    Same output as dt.strftime("%Y-%m-%d %H:%M:%S"), but formatted by NumPy in one pass.
+    """
+    if ts.empty:
+        return pd.Series(index=ts.index, dtype="object")
+    naive = ts.dt.tz_localize(None).to_numpy(dtype="datetime64[s]")
+    text = pd.Series(np.char.replace(np.datetime_as_string(naive, unit="s"), "T", " "), index=ts.index, dtype="object")
+    return text.where(ts.notna())
+
+def short_local_strings(ts: pd.Series) -> pd.Series:
+    """Format a datetime Series as 'M/D/YY HH:MM:SS' wall-clock strings (NaT -> NaN).
+    tz-aware input is shown in its own zone; naive input is taken as wall-clock already.
+
+    Same text as dt.strftime("%-m/%-d/%y %H:%M:%S"), but the date part is formatted once per
+    distinct day and glued to the HH:MM:SS slice of NumPy's ISO strings (no '%-' flags needed).
+    """
+    ok = ts.notna().to_numpy()
+    text = np.full(len(ts), np.nan, dtype=object)
+    if ok.any():
+        wall = ts[ok]
+        if wall.dt.tz is not None:
+            wall = wall.dt.tz_localize(None)
+        wall = wall.to_numpy(dtype="datetime64[s]")
+        iso = np.datetime_as_string(wall, unit="s").astype("U19")  # YYYY-MM-DDTHH:MM:SS
+        days, inv = np.unique(wall.astype("datetime64[D]"), return_inverse=True)
+        mdy = np.array([f"{d.month}/{d.day}/{d.year % 100:02d} " for d in days.tolist()])
+        hms = np.ascontiguousarray(iso.view("U1").reshape(-1, 19)[:, 11:]).view("U8").ravel()
+        text[ok] = np.char.add(mdy[inv], hms).astype(object)
+    return pd.Series(text, index=ts.index, dtype="object")
+
+def iso_utc_strings(ts: pd.Series) -> pd.Series:
+    """Format a tz-aware Series as 'YYYY-MM-DDTHH:MM:SS+00:00' strings (NaT -> NaN)."""
+    naive = ts.dt.tz_convert(UTC).dt.tz_localize(None).to_numpy(dtype="datetime64[s]")
+    text = pd.Series(np.datetime_as_string(naive, unit="s"), index=ts.index).add("+00:00")
+    return text.where(ts.notna())
+
 def add_evse_name_col(df: pd.DataFrame, col: str = "station_id") -> pd.DataFrame:
     if col not in df.columns:
         return df
-    out = df.copy()
-    out["EVSE"] = out[col].map(friendly_evse_dynamic)
+    out = df.copy(deep=False)
+    out["EVSE"] = friendly_series(out[col])
     return out
 
 def add_hvb_volts(df: pd.DataFrame, power_col="power_w", amps_col="amperage_import", out_col="hvb_volts") -> pd.DataFrame:
-    out = df.copy()
-    if power_col in out.columns and amps_col in out.columns:
-        p = pd.to_numeric(out[power_col], errors="coerce")
-        a = pd.to_numeric(out[amps_col], errors="coerce")
-        valid = (p.notna()) & (a.notna()) & (p > 0) & (a > 0)
-        result = np.full(len(out), np.nan, dtype="float64")
-        # compute only on valid indices
-        result[valid.values] = (p[valid] / a[valid]).astype("float64").values
-        hv = pd.Series(result, index=out.index, dtype="float64")
-        out[out_col] = hv.round(0).astype("Int64")
+    if power_col not in df.columns or amps_col not in df.columns:
+        return df
+    out = df.copy(deep=False)
+    p = pd.to_numeric(out[power_col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    a = pd.to_numeric(out[amps_col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    valid = (p > 0) & (a > 0) & np.isfinite(p) & np.isfinite(a)
+    result = np.full(len(out), np.nan, dtype="float64")
+    # divide in place, only where valid (NaN elsewhere)
+    np.divide(p, a, out=result, where=valid)
+    out[out_col] = pd.Series(np.rint(result), index=out.index).astype("Int64")
     return out
 
 # Normalize a dataframe to include robust time columns and friendly EVSE name
@@ -801,17 +1379,21 @@ def ensure_evse_and_time(df: pd.DataFrame) -> pd.DataFrame:
     out = add_evse_name_col(out, col="station_id")
     return out
 
-# Excel-safe: drop timezone info from any timezone-aware datetime columns
+# Excel-safe: drop timezone info from any timezone-aware datetime columns.
+# Called once per sheet, right before to_excel (build_export_xlsx); the export prep leaves tz alone.
 
 def strip_tz_for_excel(df: pd.DataFrame) -> pd.DataFrame:
     if df is None or df.empty:
         return df
-    out = df.copy()
-    for c in out.columns:
+    tz_cols = df.select_dtypes(include=["datetimetz"]).columns
+    if not len(tz_cols):
+        return df
+    # Shallow copy: the inputs are cached / session frames and must not be mutated
+    out = df.copy(deep=False)
+    for c in tz_cols:
         try:
-            if pd.api.types.is_datetime64tz_dtype(out[c]):
-                # keep wall-clock values, remove tz
-                out[c] = out[c].dt.tz_convert(None)
+            # keep wall-clock values, remove tz
+            out[c] = out[c].dt.tz_localize(None)
         except Exception:
             pass
     return out
@@ -843,7 +1425,7 @@ def build_auth_id_map(db_file: str, start_iso: str, end_iso: str, evse_id: Optio
         a_table = "realtime_authorize" if "realtime_authorize" in avail else ("authorize" if "authorize" in avail else None)
         if not a_table:
             return {}
-        adf = read_range(db_file, a_table, start_iso, end_iso, evse_id, _db_mtime(db_path))
+        adf = read_range(db_file, a_table, start_iso, end_iso, evse_id, _mtime)
         if adf is None or adf.empty:
             return {}
         if "transaction_id" in adf.columns and "id_tag" in adf.columns:
@@ -864,7 +1446,7 @@ def build_auth_maps(db_file: str, start_iso: str, end_iso: str, evse_id: Optiona
         a_table = "realtime_authorize" if "realtime_authorize" in avail else ("authorize" if "authorize" in avail else None)
         if not a_table:
             return id_map, vid_map
-        adf = read_range(db_file, a_table, start_iso, end_iso, evse_id, _db_mtime(db_path))
+        adf = read_range(db_file, a_table, start_iso, end_iso, evse_id, _mtime)
         if adf is None or adf.empty:
             return id_map, vid_map
         # Normalize column casing for VID
@@ -873,22 +1455,377 @@ def build_auth_maps(db_file: str, start_iso: str, end_iso: str, evse_id: Optiona
         idtag_col = cols.get("id_tag")
         # Try mapping by most reliable keys first
         for key in ["transaction_id", "session_id", "session"]:
-            if key in adf.columns:
-                tmp = adf.copy()
-                tmp[key] = tmp[key].astype(str)
-                if idtag_col:
-                    m = tmp.dropna(subset=[key, idtag_col]).groupby(key)[idtag_col].first().to_dict()
-                    # only set if not already set by a stronger key
-                    for k, v in m.items():
-                        id_map.setdefault(str(k), str(v))
-                if vid_col:
-                    m = tmp.dropna(subset=[key, vid_col]).groupby(key)[vid_col].first().to_dict()
-                    for k, v in m.items():
-                        vid_map.setdefault(str(k), str(v))
+            if key not in adf.columns:
+                continue
+            keyser = adf[key].astype(str)
+            for col, target in ((idtag_col, id_map), (vid_col, vid_map)):
+                if not col:
+                    continue
+                m = pd.DataFrame({"k": keyser, "v": adf[col]}).dropna().groupby("k")["v"].first()
+                # only set keys not already set by a stronger key
+                for k in set(m.index).difference(target):
+                    target[k] = str(m[k])
         return id_map, vid_map
     except Exception:
         return id_map, vid_map
 
+# ---- Session summary (one row per transaction_id) --------------------------
+# Cached on the sidebar selection + DB mtime that produced the meter/authorize frames;
+# the frames themselves are underscore args so Streamlit does not hash them. ttl matches the
+# loaders: on Postgres the mtime never changes, so this must expire with the data it summarizes.
+@st.cache_data(show_spinner=False, max_entries=8, ttl=300)
+def build_session_summary(_df: pd.DataFrame, _auth_df: Optional[pd.DataFrame], db_file: str, start_iso: str, end_iso: str,
+                          evse_ids: Tuple[str, ...], fleet_only: bool, mtime: float) -> pd.DataFrame:
+    """
+    Build one row per charging transaction with:
+      - Date/Time (AKDT) (start)
+      - Stop Time (AKDT)
+      - Location (friendly EVSE name)
+      - Transaction ID
+      - Connector Type (CHAdeMO / CCS / NACS from map)
+      - Max Power kW
+      - Energy kWh (max(energy_wh)-min(energy_wh))
+      - Duration (min)
+      - ID Tag (VID only: 'VID:<hex>' if vehicle VID was read; else blank)
+    db_file .. mtime are not read here; they only key the cache.
+    """
+    txn_col = next((c for c in ["transaction_id", "session_id", "session"] if c in _df.columns), None)
+    if not txn_col:
+        return pd.DataFrame()
+
+    work = _df.copy()
+    # Coerce numerics we use; float32 halves the bytes the groupby scans (7 significant digits is
+    # plenty for W / Wh / %). connector_id stays float64: merge_asof needs it to match the auth side.
+    for c in ["energy_wh", "power_w", "soc", "connector_id"]:
+        if c in work.columns:
+            work[c] = pd.to_numeric(work[c], errors="coerce")
+            if c != "connector_id":
+                work[c] = work[c].astype("float32")
+
+    # Sort for stable grouping, then group on a categorical key (int codes instead of hashing strings)
+    work = work.sort_values([txn_col, "timestamp"], kind="mergesort")
+    work[txn_col] = work[txn_col].astype("category")
+    # Robust time columns
+    work = add_akdt(work, "timestamp")
+    # Fill any ts_utc add_akdt could not parse in one vectorized pass, so the
+    # per-session min/max below never has to re-parse raw strings
+    nat = work["ts_utc"].isna()
+    if nat.any():
+        work.loc[nat, "ts_utc"] = pd.to_datetime(work.loc[nat, "timestamp"], utc=True, errors="coerce")
+
+    # work is already ordered by txn_col, so groups come out sorted without a second sort
+    g = work.groupby(txn_col, sort=False, observed=True)
+
+    # --- Determine display start as the earliest MeterValue in the session ---
+    # Per requirement: session "start" is the first MeterValue timestamp, not the Authorize or
+    # the first high-power moment. Use the earliest sample we have.
+    first_any_utc = g["ts_utc"].min()
+    last_utc      = g["ts_utc"].max()
+    active_start_utc = first_any_utc
+
+    # Display times in AKDT: start and stop are converted and formatted as one stacked Series
+    n_sessions = len(active_start_utc)
+    both_dt = pd.concat([active_start_utc, last_utc]).dt.tz_convert(AK)
+    first_dt = both_dt.iloc[:n_sessions]
+    last_dt  = both_dt.iloc[n_sessions:]
+
+    # Friendly display strings
+    both_fmt = short_local_strings(both_dt)
+    ts_fmt = both_fmt.iloc[:n_sessions]
+    stop_fmt = both_fmt.iloc[n_sessions:]
+
+    # Connector & location
+    # Most frequent connector per session (smallest on ties, like Series.mode), NaN if none
+    conn_counts = (
+        work[[txn_col, "connector_id"]].dropna()
+        .groupby([txn_col, "connector_id"], observed=True).size().rename("n").reset_index()
+        .sort_values(["n", "connector_id"], ascending=[False, True], kind="mergesort")
+        .drop_duplicates(txn_col)
+    )
+    connector_num = conn_counts.set_index(txn_col)["connector_id"].reindex(first_dt.index)
+    location = (g["EVSE"].first() if "EVSE" in work.columns
+                else (g["station_id"].first() if "station_id" in work.columns
+                      else pd.Series("(unknown)", index=first_dt.index)))
+
+    # Session stats (aggregates go back to float64 so the 2-decimal rounding is exact)
+    emax = g["energy_wh"].max().astype("float64") if "energy_wh" in work.columns else pd.Series(np.nan, index=first_dt.index)
+    emin = g["energy_wh"].min().astype("float64") if "energy_wh" in work.columns else pd.Series(np.nan, index=first_dt.index)
+    energy_kwh = ((emax - emin).clip(lower=0) / 1000.0).round(2)
+    max_power_kw = (g["power_w"].max().astype("float64") / 1000.0).round(2) if "power_w" in work.columns else pd.Series(np.nan, index=first_dt.index)
+
+    # ---------- VID-only matching from _auth_df (vectorized with asof joins) ----------
+    # Build a VID-only series by finding the nearest prior VID read per session start.
+    # Strategy: try same station & connector within 60s → 5min, then relax to station-only within 30min.
+    # Result is normalized to 'VID:<hex>' or blank if none.
+    # Ensure we have station_first available for the left frame
+    station_first = (g["station_id"].first() if "station_id" in work.columns else pd.Series(index=first_dt.index, dtype="object"))
+
+    if _auth_df is not None and not _auth_df.empty and "ts_utc" in _auth_df.columns:
+        auth = _auth_df.copy()
+        # Ensure both sides of merge_asof use timezone-aware UTC datetimes
+        if "ts_utc" in auth.columns:
+            auth["ts_utc"] = pd.to_datetime(auth["ts_utc"], utc=True, errors="coerce")
+        # Build a unified VID column: from explicit VID or from id_tag like 'VID:abcd...'
+        auth["vid_norm"] = ""
+        if "VID" in auth.columns:
+            auth.loc[auth["VID"].notna(), "vid_norm"] = auth.loc[auth["VID"].notna(), "VID"].astype(str)
+        if "id_tag" in auth.columns:
+            _id = auth["id_tag"].astype(str)
+            mask = _id.str.match(r"^\s*VID\s*:\s*[A-Fa-f0-9]+\s*$", na=False)
+            auth.loc[mask, "vid_norm"] = _id.loc[mask].str.extract(r"VID\s*:\s*([A-Fa-f0-9]+)", expand=False)
+        # Normalize prefix exactly to 'VID:' and drop blanks
+        auth["vid_norm"] = normalize_vid_series(auth["vid_norm"])
+        auth = auth[auth["vid_norm"].astype(str).str.len() > 0].copy()
+
+        if not auth.empty:
+            if "connector_id" in auth.columns:
+                auth["connector_id"] = pd.to_numeric(auth["connector_id"], errors="coerce")
+            # Sort once and keep only the join columns
+            auth_cols = [c for c in ["ts_utc", "station_id", "connector_id", "vid_norm"] if c in auth.columns]
+            auth_sorted = auth.sort_values("ts_utc")[auth_cols].reset_index(drop=True)
+
+            left = pd.DataFrame({
+                "k": first_dt.index,
+                "start_utc": active_start_utc.values,
+                "station_id": station_first.values if len(station_first) else [""] * len(first_dt),
+                "connector_id": connector_num.values,
+            }).sort_values("start_utc")
+            left["start_utc"] = pd.to_datetime(left["start_utc"], utc=True, errors="coerce")
+            # Shared categories so the asof `by` matching runs on integer codes
+            station_cats = pd.CategoricalDtype(
+                pd.unique(pd.concat([left["station_id"], auth_sorted["station_id"]]).dropna())
+            )
+            left["station_id"] = left["station_id"].astype(station_cats)
+            auth_sorted["station_id"] = auth_sorted["station_id"].astype(station_cats)
+
+            # One asof pass per key set against the sorted auth frame.
+            # The nearest prior read within 5min also covers the 60s window, and
+            # the station-only pass is taken at the widest (30min) tolerance.
+            station_hit = pd.merge_asof(
+                left,
+                auth_sorted[["ts_utc", "station_id", "vid_norm"]],
+                left_on="start_utc",
+                right_on="ts_utc",
+                by=["station_id"],
+                direction="backward",
+                tolerance=pd.Timedelta("30min"),
+            )
+            res = station_hit
+            if "connector_id" in auth_sorted.columns:
+                conn_hit = pd.merge_asof(
+                    left,
+                    auth_sorted,
+                    left_on="start_utc",
+                    right_on="ts_utc",
+                    by=["station_id", "connector_id"],
+                    direction="backward",
+                    tolerance=pd.Timedelta("5min"),
+                )
+                # Same station & connector wins; otherwise fall back to station-only
+                res = conn_hit
+                miss = res["vid_norm"].isna()
+                res.loc[miss, "vid_norm"] = station_hit.loc[miss, "vid_norm"]
+
+            vid_series = pd.Series(
+                res.set_index("k")["vid_norm"].fillna("").astype(str).replace("nan", ""),
+                index=first_dt.index,
+                dtype="object",
+            )
+        else:
+            vid_series = pd.Series([""] * len(first_dt), index=first_dt.index, dtype="object")
+    else:
+        vid_series = pd.Series([""] * len(first_dt), index=first_dt.index, dtype="object")
+
+    # Connector type label from site + connector number
+    conn_type_series = connector_type_series(
+        location.reindex(first_dt.index).fillna(""),
+        connector_num.reindex(first_dt.index),
+    )
+
+    # Compute Start/End SoC (first non-zero, and max per session)
+    if "soc" in work.columns:
+        # First non-zero SoC per session: mask non-positive values, then a plain first()
+        soc_nz = work["soc"].where(work["soc"] > 0)
+        start_soc = (soc_nz.groupby(work[txn_col], sort=True, observed=True).first().astype(float) / 100.0).round(2)
+        end_soc = (g["soc"].max().astype(float) / 100.0).round(2)
+    else:
+        start_soc = pd.Series(np.nan, index=first_dt.index, dtype="float")
+        end_soc = pd.Series(np.nan, index=first_dt.index, dtype="float")
+
+    out = pd.DataFrame({
+        "Date/Time (AKDT)": ts_fmt,
+        "Stop Time (AKDT)": stop_fmt,
+        "Location": location,
+        "Transaction ID": first_dt.index.astype(str),
+        "Connector #": connector_num,
+        "Connector Type": conn_type_series,
+        "Max Power kW": pd.to_numeric(max_power_kw, errors="coerce"),
+        "Energy kWh": pd.to_numeric(energy_kwh, errors="coerce"),
+        "Duration (min)": ((last_dt - first_dt).dt.total_seconds() / 60.0).round(2),
+        "SoC Start": (start_soc * 100.0).round(0),
+        "SoC End": (end_soc * 100.0).round(0),
+        "ID Tag": vid_series,   # VID only; blank if none
+        "_start": first_dt,
+        "_end": last_dt,
+    }).reset_index(drop=True)
+
+    return out
+
+# ---- Plot frame (Time + one scaled column per selected metric) --------------
+# Keyed like build_session_summary plus the zoomed transaction, so layout toggles
+# and other reruns reuse the parsed columns instead of re-coercing every metric.
+# ttl=300 like the loaders, since the mtime key never changes on Postgres.
+@st.cache_data(show_spinner=False, max_entries=16, ttl=300)
+def build_plot_df(_src: pd.DataFrame, metrics: Tuple[Tuple[str, str, float, int], ...], db_file: str, start_iso: str,
+                  end_iso: str, evse_ids: Tuple[str, ...], fleet_only: bool, txn_filter: Optional[str],
+                  mtime: float) -> pd.DataFrame:
+    """metrics is (label, column, scale, decimals) per selected Y field, in display order."""
+    # add_akdt always sets AKDT_dt next to AKDT; .get(..., default) would parse the strings anyway
+    if "AKDT_dt" in _src.columns:
+        time_col = _src["AKDT_dt"]
+    else:
+        time_col = pd.to_datetime(_src["AKDT"], format="%Y-%m-%d %H:%M:%S", errors="coerce", cache=True)
+    plot_df = pd.DataFrame({"Time": time_col})
+    for label, col, scale, rnd in metrics:
+        plot_df[label] = (pd.to_numeric(_src[col], errors="coerce") * scale).round(rnd)
+    if len(plot_df) > RESAMPLE_THRESHOLD:
+        # Both downsamplers bucket by position, so they need time-ordered x values
+        plot_df = plot_df.dropna(subset=["Time"]).sort_values("Time", kind="stable")
+    return plot_df
+
+# ---- AgGrid options for the session table ----------------------------------
+SESSION_GRID_PAGE_SIZE = 100
+# Depends only on the column schema, not the rows. cache_data (not cache_resource)
+# hands AgGrid a fresh dict each rerun, since the component may add keys to it.
+@st.cache_data(show_spinner=False)
+def session_grid_options(schema: Tuple[Tuple[str, str], ...], paginate: bool = False) -> Dict[str, Any]:
+    """schema is (column, dtype str) per displayed column; paginate splits long tables into pages."""
+    # from_dataframe only reads dtypes, so a zero-row frame with the same schema gives the same options
+    gob = GridOptionsBuilder.from_dataframe(pd.DataFrame({c: pd.Series(dtype=d) for c, d in schema}))
+    gob.configure_default_column(
+        filter=True,
+        sortable=True,
+        resizable=True,
+        flex=1,
+        minWidth=110,
+        tooltipField=None,
+    )
+    # numeric formatting
+    gob.configure_column("Max Power kW", type=["numericColumn"], valueFormatter="x.toFixed(2)")
+    gob.configure_column("Energy kWh", type=["numericColumn"], valueFormatter="x.toFixed(2)")
+    gob.configure_column("Duration (min)", type=["numericColumn"], valueFormatter="x.toFixed(2)")
+    gob.configure_column("SoC Start", type=["numericColumn"], valueFormatter="x.toFixed(0)")
+    gob.configure_column("SoC End", type=["numericColumn"], valueFormatter="x.toFixed(0)")
+    # tooltips for long text columns, with explicit widths for start/stop time
+    gob.configure_column("Date/Time (AKDT)", headerTooltip="Session start time in Alaska time", width=190)
+    gob.configure_column("Stop Time (AKDT)", headerTooltip="Session stop time in Alaska time", width=190)
+    gob.configure_column("Location", headerTooltip="Site / charger name")
+    gob.configure_column("ID Tag", headerTooltip="VID:... if vehicle ID was read")
+    gob.configure_column("Transaction ID", hide=True)
+
+    # Single-row click selection
+    gob.configure_selection(
+        selection_mode="single",
+        use_checkbox=False,
+    )
+    gob.configure_column("_start", hide=True, sort="desc")
+    gob.configure_column("_end", hide=True)
+    gob.configure_column("Connector #", type=["numericColumn"], maxWidth=120)
+    gob.configure_column("Connector Type", maxWidth=140)
+    # The following numeric columns are already formatted above; keep maxWidth for layout
+    gob.configure_column("Max Power kW", maxWidth=140)
+    gob.configure_column("Energy kWh", maxWidth=140)
+    gob.configure_column("Duration (min)", maxWidth=160)
+    if paginate:
+        # Client-side pages: sort/filter still span every session, but only one page of rows is rendered
+        gob.configure_pagination(paginationAutoPageSize=False, paginationPageSize=SESSION_GRID_PAGE_SIZE)
+    return gob.build()
+
+# ---- Excel export (cached workbook bytes) -----------------------------------
+# Keyed like build_session_summary plus the Status tab's vendor-only toggle and the engine;
+# the prepared sheets are underscore args, so reruns that change none of those reuse the bytes.
+# ttl=300 like the loaders, so on Postgres (constant mtime) the workbook can't outlive the page data.
+@st.cache_data(show_spinner=False, max_entries=4, ttl=300)
+def build_export_xlsx(_summary: pd.DataFrame, _main: pd.DataFrame, _status: pd.DataFrame, _auth: pd.DataFrame,
+                      _conn: pd.DataFrame, db_file: str, start_iso: str, end_iso: str, evse_ids: Tuple[str, ...],
+                      fleet_only: bool, vendor_only: bool, mtime: float, engine: str, include_main: bool = True) -> bytes:
+    """Write the Summary / Main Data / Status / Auth / Connectivity sheets and return the .xlsx bytes.
+    include_main=False leaves out the (by far largest) Main Data sheet.
+    db_file .. engine are not read here; they only key the cache.
+    """
+    excel_buf = BytesIO()
+    with make_excel_writer(excel_buf) as writer:
+        # --- Write Summary FIRST ---
+        strip_tz_for_excel(_summary).to_excel(
+            writer,
+            sheet_name="Summary",
+            index=False,
+            columns=[c for c in _summary.columns if not c.startswith("_")]
+        )
+        # Then Main Data
+        if include_main:
+            strip_tz_for_excel(_main).to_excel(writer, sheet_name="Main Data", index=False)
+        # Build Status export with selected/renamed columns
+        status_selected = pd.DataFrame()
+        if not _status.empty:
+            # Date/Time (AKDT) is already the naive AK datetime set from AKDT_dt in the export prep
+            status_cols = [
+                ("Date/Time (AKDT)", "Date/Time (AKDT)"),
+                ("EVSE", "EVSE"),
+                ("status", "Status"),
+                ("error_code", "Error_Code"),
+                ("vendor_error_code", "Vendor Error Code"),
+                ("connector_id", "Connector_id"),
+                ("id", "ID"),
+                ("impact", "Impact"),
+                ("description", "Description"),
+            ]
+            keep_cols = [c for c, _ in status_cols if c in _status.columns]
+            status_selected = _status[keep_cols].rename(columns=dict(status_cols))
+            strip_tz_for_excel(status_selected).to_excel(writer, sheet_name="Status", index=False)
+        # Auth (optional)
+        if not _auth.empty:
+            strip_tz_for_excel(_auth).to_excel(writer, sheet_name="Auth", index=False)
+
+        # Connectivity (optional)
+        if not _conn.empty:
+            strip_tz_for_excel(_conn).to_excel(writer, sheet_name="Connectivity", index=False)
+
+        # --- Formatting (xlsxwriter only) ---
+        try:
+            if EXCEL_ENGINE == "xlsxwriter":
+                workbook = writer.book
+                # Datetime cells already carry EXCEL_DATETIME_FORMAT (make_excel_writer); only widths here
+                # Summary A, B are datetimes
+                if "Summary" in writer.sheets:
+                    ws = writer.sheets["Summary"]
+                    ws.set_column("A:B", 20)
+                    num2_fmt = workbook.add_format({"num_format": "0.00"})
+                    # Start SoC (I) and End SoC (J) as numeric with 2 decimals
+                    ws.set_column("I:J", 12, num2_fmt)
+                # Status A is datetime
+                if "Status" in writer.sheets:
+                    ws = writer.sheets["Status"]
+                    ws.set_column("A:A", 20)
+                # Connectivity A is datetime; Duration (D) uses 2 decimals
+                if "Connectivity" in writer.sheets:
+                    ws = writer.sheets["Connectivity"]
+                    ws.set_column("A:A", 20)
+                    num2_fmt = workbook.add_format({"num_format": "0.00"})
+                    ws.set_column("D:D", 12, num2_fmt)
+        except Exception:
+            pass
+    return excel_buf.getvalue()
+
+# Main Data as zstd Parquet: columnar and compressed, far cheaper to write than the xlsx sheet
+# (same ttl as build_export_xlsx, since the mtime key never changes on Postgres)
+@st.cache_data(show_spinner=False, max_entries=4, ttl=300)
+def build_main_parquet(_main: pd.DataFrame, db_file: str, start_iso: str, end_iso: str, evse_ids: Tuple[str, ...],
+                       fleet_only: bool, mtime: float) -> bytes:
+    buf = BytesIO()
+    _main.to_parquet(buf, engine="pyarrow", compression="zstd", compression_level=3, index=False)
+    return buf.getvalue()
+
 # Helper: Streamlit dialog (fallback inline if st.dialog missing)
 def open_dialog(title: str, body: Callable[[], None]) -> None:
     if hasattr(st, "dialog"):
@@ -900,6 +1837,9 @@ def open_dialog(title: str, body: Callable[[], None]) -> None:
         st.info(f"(Dialog not supported in this Streamlit version) — {title}")
         body()
 
+# Table names for this rerun, shared by the diagnostics drawer and the tabs
+avail_tables = table_list(db_path, db_mtime)
+
 # ---- Diagnostics drawer -----------------------------------------------------
 with st.expander("🧰 Diagnostics", expanded=False):
     st.write(f"**DB (sidebar path):** `{db_path}`")
@@ -910,28 +1850,19 @@ with st.expander("🧰 Diagnostics", expanded=False):
     else:
         st.caption("RENDER_DB_URL seen: no")
         st.caption(f"DB engine in use: SQLite -> {db_path}")
-    tl = table_list(db_path, _db_mtime(db_path))
+    tl = avail_tables
     if tl:
         st.write("Tables found:", ", ".join(tl))
-        def mmc(table):
-            try:
-                engine = get_engine(db_path)
-                with engine.connect() as con:
-                    res = con.execute(f"SELECT COUNT(*), MIN(timestamp), MAX(timestamp) FROM {table}")
-                    c, mn, mx = res.fetchone()
-                st.write(f"**{table}**: count={c} min={mn} max={mx}")
-            except Exception:
-                pass
-        for t in [
+        stat_tables = tuple(t for t in [
             "realtime_meter_values",
             "meter_values",
             "realtime_status_notifications",
             "status_notifications",
             "realtime_authorize",
             "realtime_websocket"
-        ]:
-            if t in tl: 
-                mmc(t)
+        ] if t in tl)
+        for t, c, mn, mx in table_stats(db_path, stat_tables, db_mtime):
+            st.write(f"**{t}**: count={c} min={mn} max={mx}")
 
         # If we're on Render/Postgres, try to show the latest ingest heartbeats written by nightly_ingest.sh
         if _env_render:
@@ -968,7 +1899,7 @@ with tabs[0]:
     evse_id = None  # keep DB query broad; filter after read using selected_evse_ids
     evse_ids_set = set(str(x) for x in selected_evse_ids) if 'selected_evse_ids' in locals() else set()
 
-    avail = table_list(db_path, _db_mtime(db_path))
+    avail = avail_tables
     # Prefer session-shaped tables if present on Render
     session_table = (
         "sessions"
@@ -980,20 +1911,20 @@ with tabs[0]:
     if not meter_table:
         st.info("No meter tables found.")
     else:
-        mdf = read_range(db_path, meter_table, start_utc_iso, end_utc_iso, evse_id, _db_mtime(db_path))
+        mdf = read_range(db_path, meter_table, start_utc_iso, end_utc_iso, evse_id, db_mtime)
         # --- Also pull CEA samples in the same window and normalize to meter schema ---
         cea_df = pd.DataFrame()
         try:
-            cea_df = read_cea_samples(db_path, start_utc_iso, end_utc_iso, _db_mtime(db_path))
+            cea_df = read_cea_samples(db_path, start_utc_iso, end_utc_iso, db_mtime)
         except Exception:
             cea_df = pd.DataFrame()
         if not cea_df.empty:
-            # Apply sidebar EVSE filter (if any)
-            if 'evse_ids_set' in locals() and len(evse_ids_set) > 0:
-                cea_df = cea_df[cea_df["station_id"].astype(str).isin(evse_ids_set)]
-            # Apply fleet filter (include CEA by default since we added it to EVSE_NAME_MAP)
-            if fleet_only:
-                cea_df = cea_df[cea_df["station_id"].astype(str).isin(FLEET_IDS)]
+            # Sidebar EVSE filter (if any) AND fleet filter (include CEA by default since we
+            # added it to EVSE_NAME_MAP), as one mask
+            id_sets = ([evse_ids_set] if 'evse_ids_set' in locals() and len(evse_ids_set) > 0 else []) \
+                + ([FLEET_IDS] if fleet_only else [])
+            if id_sets:
+                cea_df = cea_df[station_in(cea_df["station_id"], *id_sets)]
         
         # If we pulled raw rows (like on Render), drop synthetic transaction_ids
         if not mdf.empty and "transaction_id" in mdf.columns:
@@ -1001,20 +1932,23 @@ with tabs[0]:
             synth_mask = tx.str.startswith("synth:") | tx.str.startswith("synthas_")
             mdf = mdf[~synth_mask].copy()
 
-        # Apply filters to LynkWell data first
-        if 'evse_ids_set' in locals() and len(evse_ids_set) > 0:
-            # apply EVSE filter only if this frame actually has station_id
-            if evse_ids_set and ("station_id" in mdf.columns):
-                mdf = mdf[mdf["station_id"].astype(str).isin(evse_ids_set)]
-        if fleet_only:
-            mdf = mdf[mdf["station_id"].astype(str).isin(FLEET_IDS)]
+        # Apply filters to LynkWell data first (EVSE filter only if this frame actually has station_id)
+        id_sets = ([evse_ids_set] if 'evse_ids_set' in locals() and evse_ids_set and "station_id" in mdf.columns else []) \
+            + ([FLEET_IDS] if fleet_only else [])
+        if id_sets:
+            mdf = mdf[station_in(mdf["station_id"], *id_sets)]
 
-        # Combine LynkWell and CEA (align columns; concat if either is non-empty)
+        # Combine LynkWell and CEA (align columns; concat if either is non-empty).
+        # concat copies into one new frame, so the sources are not copied up front.
         combined_sources = []
         if not mdf.empty:
-            combined_sources.append(mdf.copy())
+            combined_sources.append(mdf)
         if not cea_df.empty:
-            combined_sources.append(cea_df.copy())
+            cea_part = cea_df.copy(deep=False)
+            # LynkWell timestamps are ISO strings; match them so the combined column has one type
+            if combined_sources and isinstance(cea_part["timestamp"].dtype, pd.DatetimeTZDtype):
+                cea_part["timestamp"] = iso_utc_strings(cea_part["timestamp"])
+            combined_sources.append(cea_part)
 
         # 🔽 Fallback for Render Postgres: if no LynkWell/CEA rows, try grabbing raw rows from Postgres
         if not combined_sources:
@@ -1047,7 +1981,7 @@ with tabs[0]:
                 with st.expander("Show raw meter rows from database (latest 200)"):
                     st.dataframe(raw_fallback)
                 # IMPORTANT: feed this into the normal pipeline below so charts / summaries still try to render
-                combined_sources.append(raw_fallback.copy())
+                combined_sources.append(raw_fallback)
             else:
                 # If we truly have no meter-like rows, but a session-shaped table exists on Render,
                 # show that instead of just stopping.
@@ -1080,104 +2014,35 @@ with tabs[0]:
 
             # Normalize time + EVSE naming, and compute hvb_volts if needed
             mdf = add_akdt(mdf, "timestamp")
+            if isinstance(mdf["timestamp"].dtype, pd.DatetimeTZDtype):
+                # CEA-only window: ts_utc is set, keep the raw column in the same ISO text form as LynkWell rows
+                mdf["timestamp"] = iso_utc_strings(mdf["timestamp"])
             mdf = add_evse_name_col(mdf, "station_id")
             # For rows without hvb_volts but with power/amps, compute it
             mdf = add_hvb_volts(mdf)
 
             df = mdf  # for export and downstream
 
-            # --- Build session summary (robust for LynkWell + CEA) ---------------------
-            # Normalize keys so CEA sessions appear downstream
-            try:
-                work = df.copy()
-
-                # Ensure UTC datetime for grouping
-                if "ts_utc" not in work.columns:
-                    s = work["timestamp"].astype(str).str.replace("Z", "+00:00", regex=False)
-                    work["ts_utc"] = pd.to_datetime(s, errors="coerce", utc=True)
-
-                # Normalize transaction_id to real NaN for blanks and odd strings
-                if "transaction_id" in work.columns:
-                    tid = work["transaction_id"].astype(str).str.strip()
-                    tid = tid.replace({"": np.nan, "None": np.nan, "none": np.nan,
-                                       "NaN": np.nan, "nan": np.nan, "NULL": np.nan, "null": np.nan})
-                    work["transaction_id"] = tid
-                else:
-                    work["transaction_id"] = np.nan
-
-                # Keep only rows that belong to a session
-                work = work.dropna(subset=["transaction_id", "ts_utc"]).copy()
-
-                # Coerce numerics we aggregate
-                for col in ["energy_wh", "power_w", "soc", "amperage_import", "offered_current_a", "hvb_volts", "connector_id"]:
-                    if col in work.columns:
-                        work[col] = pd.to_numeric(work[col], errors="coerce")
-
-                grp = work.groupby(["station_id", "transaction_id"], dropna=False)
-                session_summary = grp.agg(
-                    start_utc=("ts_utc", "min"),
-                    end_utc=("ts_utc", "max"),
-                    start_soc=("soc", lambda s: pd.to_numeric(s, errors="coerce").dropna().iloc[0] if s.notna().any() else np.nan),
-                    end_soc=("soc", "max"),
-                    energy_wh=("energy_wh", "max"),
-                    max_power_w=("power_w", "max"),
-                    connector_id=("connector_id", lambda s: pd.to_numeric(s, errors="coerce").dropna().iloc[-1] if s.notna().any() else np.nan),
-                ).reset_index()
-
-                # Duration (minutes) and display times in AKDT
-                session_summary["Duration (min)"] = (session_summary["end_utc"] - session_summary["start_utc"]).dt.total_seconds() / 60.0
-                session_summary["Date/Time (AKDT)"] = session_summary["start_utc"].dt.tz_convert(AK).dt.strftime("%Y-%m-%d %H:%M:%S")
-                session_summary["Stop Time (AKDT)"] = session_summary["end_utc"].dt.tz_convert(AK).dt.strftime("%Y-%m-%d %H:%M:%S")
-
-                # Friendly names and connector type
-                session_summary["Location"] = session_summary["station_id"].map(friendly_evse_dynamic)
-                session_summary["Connector Type"] = session_summary.apply(
-                    lambda r: connector_type_for(r["Location"], r.get("connector_id")), axis=1
-                )
-
-                # Convert power/energy to kW/kWh and SoC to 0-1 scale with 2 decimals
-                session_summary["Max Power kW"] = (pd.to_numeric(session_summary["max_power_w"], errors="coerce") / 1000.0).round(2)
-                session_summary["Energy kWh"] = (pd.to_numeric(session_summary["energy_wh"], errors="coerce") / 1000.0).round(2)
-                session_summary["Start SoC"] = (pd.to_numeric(session_summary["start_soc"], errors="coerce") / 100.0).round(2)
-                session_summary["End SoC"] = (pd.to_numeric(session_summary["end_soc"], errors="coerce") / 100.0).round(2)
-
-                session_summary = session_summary.rename(columns={"transaction_id": "Transaction ID"})
-                session_summary = session_summary[
-                    [
-                        "Date/Time (AKDT)", "Stop Time (AKDT)", "Location", "Transaction ID",
-                        "Connector Type", "Max Power kW", "Energy kWh", "Duration (min)",
-                        "Start SoC", "End SoC"
-                    ]
-                ].sort_values("Date/Time (AKDT)", ascending=False)
-            except Exception:
-                # If anything goes wrong, keep a safe empty frame to avoid downstream KeyErrors
-                session_summary = pd.DataFrame(
-                    columns=[
-                        "Date/Time (AKDT)", "Stop Time (AKDT)", "Location", "Transaction ID",
-                        "Connector Type", "Max Power kW", "Energy kWh", "Duration (min)",
-                        "Start SoC", "End SoC", "Stop Time (AKDT)"
-                    ]
-                )
             # --- Normalize keys so CEA sessions appear downstream -----------------
             # transaction_id can come through as "", "None", "nan" (string) etc. Normalize to real NaN.
             if "transaction_id" in df.columns:
-                df["transaction_id"] = df["transaction_id"].astype(str).str.strip()
-                df.loc[df["transaction_id"].isin(["", "None", "none", "NaN", "nan", "NULL", "null"]), "transaction_id"] = np.nan
+                tid = df["transaction_id"].astype(str).str.strip()
+                df["transaction_id"] = tid.mask(tid.isin(_BAD_TXN))
 
             # connector_id should be numeric for grouping/labeling; keep NaN if not parseable.
             if "connector_id" in df.columns:
                 df["connector_id"] = pd.to_numeric(df["connector_id"], errors="coerce")
-            id_tag_map, vid_map = build_auth_maps(db_path, start_utc_iso, end_utc_iso, evse_id, _db_mtime(db_path))
+            id_tag_map, vid_map = build_auth_maps(db_path, start_utc_iso, end_utc_iso, evse_id, db_mtime)
 
             # Load authorize rows for timestamp proximity matching (to backfill id_tag/VID)
             auth_df = pd.DataFrame()
             if "realtime_authorize" in avail or "authorize" in avail:
                 a_tbl = "realtime_authorize" if "realtime_authorize" in avail else "authorize"
-                auth_df = read_range(db_path, a_tbl, start_utc_iso, end_utc_iso, evse_id, _db_mtime(db_path))
-                if not auth_df.empty and 'evse_ids_set' in locals() and len(evse_ids_set) > 0:
-                    auth_df = auth_df[auth_df["station_id"].astype(str).isin(evse_ids_set)]
-                if fleet_only and not auth_df.empty:
-                    auth_df = auth_df[auth_df["station_id"].astype(str).isin(FLEET_IDS)]
+                auth_df = read_range(db_path, a_tbl, start_utc_iso, end_utc_iso, evse_id, db_mtime)
+                id_sets = ([evse_ids_set] if 'evse_ids_set' in locals() and len(evse_ids_set) > 0 else []) \
+                    + ([FLEET_IDS] if fleet_only else [])
+                if not auth_df.empty and id_sets:
+                    auth_df = auth_df[station_in(auth_df["station_id"], *id_sets)]
                 if not auth_df.empty:
                     auth_df = add_akdt(auth_df, "timestamp")
                     # Normalize column naming for VID casing
@@ -1190,234 +2055,10 @@ with tabs[0]:
             # Make authorize rows available to Export tab even without an Activation tab
             st.session_state["auth_df_display"] = auth_df.copy() if auth_df is not None else pd.DataFrame()
             
-            # --- Session summary (one row per transaction_id) ---
-            def _build_session_summary(df: pd.DataFrame) -> pd.DataFrame:
-                """
-                Build one row per charging transaction with:
-                  - Date/Time (AKDT) (start)
-                  - Stop Time (AKDT)
-                  - Location (friendly EVSE name)
-                  - Transaction ID
-                  - Connector Type (CHAdeMO / CCS / NACS from map)
-                  - Max Power kW
-                  - Energy kWh (max(energy_wh)-min(energy_wh))
-                  - Duration (min)
-                  - ID Tag (VID only: 'VID:<hex>' if vehicle VID was read; else blank)
-                """
-                txn_col = next((c for c in ["transaction_id", "session_id", "session"] if c in df.columns), None)
-                if not txn_col:
-                    return pd.DataFrame()
-
-                work = df.copy()
-                # Coerce numerics we use
-                for c in ["energy_wh", "power_w", "soc", "connector_id"]:
-                    if c in work.columns:
-                        work[c] = pd.to_numeric(work[c], errors="coerce")
-
-                # Sort for stable grouping
-                work = work.sort_values([txn_col, "timestamp"], kind="mergesort")
-                # Robust time columns
-                work = add_akdt(work, "timestamp")
-
-                g = work.groupby(txn_col, sort=True)
-
-                # --- Determine display start as the earliest MeterValue in the session ---
-                # Per requirement: session "start" is the first MeterValue timestamp, not the Authorize or
-                # the first high-power moment. Use the earliest sample we have.
-                first_any_utc = g["ts_utc"].min()
-                last_utc      = g["ts_utc"].max()
-                # Fallback to raw strings if any NaT snuck in
-                if "timestamp" in work.columns:
-                    raw_min = pd.to_datetime(g["timestamp"].min(), utc=True, errors="coerce")
-                    raw_max = pd.to_datetime(g["timestamp"].max(), utc=True, errors="coerce")
-                    first_any_utc = first_any_utc.fillna(raw_min)
-                    last_utc      = last_utc.fillna(raw_max)
-                active_start_utc = first_any_utc
-
-                # Display times in AKDT
-                first_dt = active_start_utc.dt.tz_convert(AK)
-                last_dt  = last_utc.dt.tz_convert(AK)
-
-                # Friendly display strings
-                try:
-                    ts_fmt = first_dt.dt.strftime("%-m/%-d/%y %H:%M:%S")
-                except Exception:
-                    ts_fmt = first_dt.dt.strftime("%m/%d/%y %H:%M:%S")
-                try:
-                    stop_fmt = last_dt.dt.strftime("%-m/%-d/%y %H:%M:%S")
-                except Exception:
-                    stop_fmt = last_dt.dt.strftime("%m/%d/%y %H:%M:%S")
-
-                # Connector & location
-                connector_num = g["connector_id"].agg(
-                    lambda s: (s.mode().iloc[0] if s.dropna().mode().shape[0]
-                               else (s.dropna().iloc[0] if s.dropna().shape[0] else np.nan))
-                )
-                location = (g["EVSE"].first() if "EVSE" in work.columns
-                            else (g["station_id"].first() if "station_id" in work.columns
-                                  else pd.Series("(unknown)", index=first_dt.index)))
-
-                # Session stats
-                emax = pd.to_numeric(g["energy_wh"].max(), errors="coerce") if "energy_wh" in work.columns else pd.Series(np.nan, index=first_dt.index)
-                emin = pd.to_numeric(g["energy_wh"].min(), errors="coerce") if "energy_wh" in work.columns else pd.Series(np.nan, index=first_dt.index)
-                energy_kwh = ((emax - emin).clip(lower=0) / 1000.0).round(2)
-                max_power_kw = (pd.to_numeric(g["power_w"].max(), errors="coerce") / 1000.0).round(2) if "power_w" in work.columns else pd.Series(np.nan, index=first_dt.index)
-
-                # ---------- VID-only matching from auth_df (vectorized with asof joins) ----------
-                # Build a VID-only series by finding the nearest prior VID read per session start.
-                # Strategy: try same station & connector within 60s → 5min, then relax to station-only within 30min.
-                # Result is normalized to 'VID:<hex>' or blank if none.
-                # Ensure we have station_first available for the left frame
-                station_first = (g["station_id"].first() if "station_id" in work.columns else pd.Series(index=first_dt.index, dtype="object"))
-
-                def _normalize_vid_string(v: object) -> str:
-                    if v is None or (isinstance(v, float) and np.isnan(v)):
-                        return ""
-                    s = str(v).strip()
-                    if not s:
-                        return ""
-                    if s.lower().startswith("vid:"):
-                        return "VID:" + s.split(":", 1)[1]
-                    return "VID:" + s
-
-                if auth_df is not None and not auth_df.empty and "ts_utc" in auth_df.columns:
-                    auth = auth_df.copy()
-                    # Ensure both sides of merge_asof use timezone-aware UTC datetimes
-                    if "ts_utc" in auth.columns:
-                        auth["ts_utc"] = pd.to_datetime(auth["ts_utc"], utc=True, errors="coerce")
-                    # Build a unified VID column: from explicit VID or from id_tag like 'VID:abcd...'
-                    auth["vid_norm"] = ""
-                    if "VID" in auth.columns:
-                        auth.loc[auth["VID"].notna(), "vid_norm"] = auth.loc[auth["VID"].notna(), "VID"].astype(str)
-                    if "id_tag" in auth.columns:
-                        _id = auth["id_tag"].astype(str)
-                        mask = _id.str.match(r"^\s*VID\s*:\s*[A-Fa-f0-9]+\s*$", na=False)
-                        auth.loc[mask, "vid_norm"] = _id.loc[mask].str.extract(r"VID\s*:\s*([A-Fa-f0-9]+)", expand=False)
-                    # Normalize prefix exactly to 'VID:' and drop blanks
-                    auth["vid_norm"] = auth["vid_norm"].apply(_normalize_vid_string)
-                    auth = auth[auth["vid_norm"].astype(str).str.len() > 0].copy()
-
-                    if not auth.empty:
-                        if "connector_id" in auth.columns:
-                            auth["connector_id"] = pd.to_numeric(auth["connector_id"], errors="coerce")
-                        auth = auth.sort_values("ts_utc")
-
-                        left = pd.DataFrame({
-                            "k": first_dt.index,
-                            "start_utc": active_start_utc.values,
-                            "station_id": station_first.values if len(station_first) else [""] * len(first_dt),
-                            "connector_id": connector_num.values,
-                        }).sort_values("start_utc")
-                        left["start_utc"] = pd.to_datetime(left["start_utc"], utc=True, errors="coerce")
-
-                        def _asof_by_station_and_connector(cand: pd.DataFrame, tol: str) -> pd.DataFrame:
-                            return pd.merge_asof(
-                                left,
-                                cand.sort_values("ts_utc")["ts_utc station_id connector_id vid_norm".split()],
-                                left_on="start_utc",
-                                right_on="ts_utc",
-                                by=["station_id", "connector_id"],
-                                direction="backward",
-                                tolerance=pd.Timedelta(tol),
-                            )
-
-                        def _asof_by_station_only(cand: pd.DataFrame, tol: str) -> pd.DataFrame:
-                            return pd.merge_asof(
-                                left,
-                                cand.sort_values("ts_utc")["ts_utc station_id vid_norm".split()],
-                                left_on="start_utc",
-                                right_on="ts_utc",
-                                by=["station_id"],
-                                direction="backward",
-                                tolerance=pd.Timedelta(tol),
-                            )
-
-                        # Pass 1: require same connector within 60s, then 5min
-                        if "connector_id" in auth.columns:
-                            res = _asof_by_station_and_connector(auth, "60s")
-                            miss = res["vid_norm"].isna()
-                            if miss.any():
-                                res2 = _asof_by_station_and_connector(auth, "5min")
-                                res.loc[miss, "vid_norm"] = res2.loc[miss, "vid_norm"]
-                        else:
-                            # If no connector in auth table, start with station-only 60s
-                            res = _asof_by_station_only(auth, "60s")
-                            miss = res["vid_norm"].isna()
-                            if miss.any():
-                                res2 = _asof_by_station_only(auth, "5min")
-                                res.loc[miss, "vid_norm"] = res2.loc[miss, "vid_norm"]
-
-                        # Pass 2: relax to station-only within 30min for remaining
-                        miss = res["vid_norm"].isna()
-                        if miss.any():
-                            res3 = _asof_by_station_only(auth, "30min")
-                            res.loc[miss, "vid_norm"] = res3.loc[miss, "vid_norm"]
-
-                        vid_series = pd.Series(
-                            res.set_index("k")["vid_norm"].fillna("").astype(str).replace("nan", ""),
-                            index=first_dt.index,
-                            dtype="object",
-                        )
-                    else:
-                        vid_series = pd.Series([""] * len(first_dt), index=first_dt.index, dtype="object")
-                else:
-                    vid_series = pd.Series([""] * len(first_dt), index=first_dt.index, dtype="object")
-
-                # Connector type label from site + connector number
-                conn_type_series = pd.Series(
-                    [
-                        connector_type_for(
-                            location.loc[k] if k in location.index else "",
-                            connector_num.loc[k] if k in connector_num.index else None,
-                        )
-                        for k in first_dt.index
-                    ],
-                    index=first_dt.index,
-                    dtype="object",
-                )
-
-                # Compute Start/End SoC (first non-zero, and max per session)
-                if "soc" in work.columns:
-                    def _first_nonzero(series: pd.Series) -> float:
-                        s = pd.to_numeric(series, errors="coerce")
-                        nz = s[s > 0]
-                        return float(nz.iloc[0]) if len(nz) > 0 else np.nan
-                    start_soc = (g["soc"].apply(_first_nonzero).astype(float) / 100.0).round(2)
-                    end_soc = (pd.to_numeric(g["soc"].max(), errors="coerce").astype(float) / 100.0).round(2)
-                else:
-                    start_soc = pd.Series(np.nan, index=first_dt.index, dtype="float")
-                    end_soc = pd.Series(np.nan, index=first_dt.index, dtype="float")
-
-                out = pd.DataFrame({
-                    "Date/Time (AKDT)": ts_fmt,
-                    "Stop Time (AKDT)": stop_fmt,
-                    "Location": location,
-                    "Transaction ID": first_dt.index.astype(str),
-                    "Connector #": connector_num,
-                    "Connector Type": conn_type_series,
-                    "Max Power kW": pd.to_numeric(max_power_kw, errors="coerce"),
-                    "Energy kWh": pd.to_numeric(energy_kwh, errors="coerce"),
-                    "Duration (min)": ((last_dt - first_dt).dt.total_seconds() / 60.0).round(2),
-                    "SoC Start": (start_soc * 100.0).round(0),
-                    "SoC End": (end_soc * 100.0).round(0),
-                    "ID Tag": vid_series,   # VID only; blank if none
-                    "_start": first_dt,
-                    "_end": last_dt,
-                }).reset_index(drop=True)
-
-                # Ensure display start string derived from _start
-                try:
-                    dt_series = out["_start"].dt.tz_convert(AK)
-                    try:
-                        out["Date/Time (AKDT)"] = dt_series.dt.strftime("%-m/%-d/%y %H:%M:%S")
-                    except Exception:
-                        out["Date/Time (AKDT)"] = dt_series.dt.strftime("%m/%d/%y %H:%M:%S")
-                except Exception:
-                    pass
-
-                return out
-
-            session_summary = _build_session_summary(mdf)
+            session_summary = build_session_summary(
+                mdf, auth_df, db_path, start_utc_iso, end_utc_iso,
+                tuple(sorted(evse_ids_set)), bool(fleet_only), db_mtime,
+            )
             # try to pull id_tag / VID from authorize rows for this same time window
             try:
                 auth_id_map, auth_vid_map = build_auth_maps(
@@ -1425,7 +2066,7 @@ with tabs[0]:
                     start_utc_iso,
                     end_utc_iso,
                     None,
-                    _db_mtime(db_path),
+                    db_mtime,
                 )
             except Exception:
                 auth_id_map, auth_vid_map = {}, {}
@@ -1451,12 +2092,10 @@ with tabs[0]:
             if session_summary is None or session_summary.empty:
                 session_summary = pd.DataFrame(columns=_summary_cols)
             else:
-                # Backfill any missing columns to avoid KeyErrors downstream
-                for _c in _summary_cols:
-                    if _c not in session_summary.columns:
-                        session_summary[_c] = pd.Series([np.nan] * len(session_summary))
-                # Ensure column order for consistency
-                session_summary = session_summary[_summary_cols + [c for c in session_summary.columns if c not in _summary_cols]]
+                # Fixed column order; any missing summary column is backfilled with NaN (avoids KeyErrors downstream)
+                session_summary = session_summary.reindex(
+                    columns=_summary_cols + [c for c in session_summary.columns if c not in _summary_cols]
+                )
 
                 # 🔽 Force newest → oldest by the real datetime (only if we actually have _start)
                 if "_start" in session_summary.columns:
@@ -1503,7 +2142,7 @@ with tabs[0]:
                             start_utc_iso,
                             end_utc_iso,
                             None,
-                            _db_mtime(db_path),
+                            db_mtime,
                         )
                     except Exception:
                         id_map, vid_map = {}, {}
@@ -1517,14 +2156,19 @@ with tabs[0]:
                 else:
                     session_summary = session_summary.reset_index(drop=True)
                 # ---- Make latest session summary available to Export tab (with cache-busting) ----
-                st.session_state["export_session_summary"] = session_summary.copy()
-                st.session_state["export_context"] = {
+                # Stored by reference and only when the context changes; readers treat it as
+                # read-only (the Export tab works on its own copy).
+                export_ctx = {
                     "start": start_utc_iso,
                     "end": end_utc_iso,
                     "evse_ids": list(selected_evse_ids),
                     "fleet_only": bool(fleet_only),
-                    "db_mtime": _db_mtime(db_path),
+                    "db_mtime": db_mtime,
                 }
+                if (st.session_state.get("export_context") != export_ctx
+                        or "export_session_summary" not in st.session_state):
+                    st.session_state["export_session_summary"] = session_summary
+                    st.session_state["export_context"] = export_ctx
 
             # === Session History table (one row per transaction) ===
             if session_summary.empty:
@@ -1537,92 +2181,45 @@ with tabs[0]:
 
                 # Prefer AgGrid (true row-click selection). Fallback to data_editor if not installed.
                 if AGGRID_AVAILABLE:
-                    tbl_full = session_summary[
+                    # session_summary is already newest -> oldest with a fresh RangeIndex, so grid row
+                    # positions index straight into its _start/_end columns
+                    tbl_display = session_summary[
                         [
                             "Date/Time (AKDT)", "Stop Time (AKDT)", "Location",
                             "Connector #", "Connector Type", "Max Power kW", "Energy kWh", "Duration (min)",
                             "SoC Start", "SoC End", "ID Tag", "Transaction ID",
-                            "_start", "_end"
                         ]
-                    ].copy()
-                    tbl_full = tbl_full.sort_values("_start", ascending=False, kind="mergesort").reset_index(drop=True)
-                    tbl_display = tbl_full.drop(columns=["_start", "_end"], errors="ignore")
-                    gob = GridOptionsBuilder.from_dataframe(tbl_display)
-                    gob.configure_default_column(
-                        filter=True,
-                        sortable=True,
-                        resizable=True,
-                        flex=1,
-                        minWidth=110,
-                        tooltipField=None,
-                    )
-                    # numeric formatting
-                    gob.configure_column("Max Power kW", type=["numericColumn"], valueFormatter="x.toFixed(2)")
-                    gob.configure_column("Energy kWh", type=["numericColumn"], valueFormatter="x.toFixed(2)")
-                    gob.configure_column("Duration (min)", type=["numericColumn"], valueFormatter="x.toFixed(2)")
-                    gob.configure_column("SoC Start", type=["numericColumn"], valueFormatter="x.toFixed(0)")
-                    gob.configure_column("SoC End", type=["numericColumn"], valueFormatter="x.toFixed(0)")
-                    # tooltips for long text columns, with explicit widths for start/stop time
-                    gob.configure_column("Date/Time (AKDT)", headerTooltip="Session start time in Alaska time", width=190)
-                    gob.configure_column("Stop Time (AKDT)", headerTooltip="Session stop time in Alaska time", width=190)
-                    gob.configure_column("Location", headerTooltip="Site / charger name")
-                    gob.configure_column("ID Tag", headerTooltip="VID:... if vehicle ID was read")
-                    gob.configure_column("Transaction ID", hide=True)
-
-                    # Single-row click selection
-                    gob.configure_selection(
-                        selection_mode="single",
-                        use_checkbox=False,
-                    )
-                    gob.configure_column("_start", hide=True, sort="desc")
-                    gob.configure_column("_end", hide=True)
-                    gob.configure_column("Connector #", type=["numericColumn"], maxWidth=120)
-                    gob.configure_column("Connector Type", maxWidth=140)
-                    # The following numeric columns are already formatted above; keep maxWidth for layout
-                    gob.configure_column("Max Power kW", maxWidth=140)
-                    gob.configure_column("Energy kWh", maxWidth=140)
-                    gob.configure_column("Duration (min)", maxWidth=160)
-
+                    ]
                     grid = AgGrid(
                         tbl_display,
-                        gridOptions=gob.build(),
+                        gridOptions=session_grid_options(
+                            tuple((c, str(d)) for c, d in tbl_display.dtypes.items()),
+                            paginate=len(tbl_display) > SESSION_GRID_PAGE_SIZE,
+                        ),
                         update_mode=GridUpdateMode.SELECTION_CHANGED,
                         fit_columns_on_grid_load=True,
                         height=320,
                         allow_unsafe_jscode=False,
+                        # Stable while the sessions are unchanged, so unrelated reruns update the mounted
+                        # grid (keeping its selection) instead of remounting it; a new data set remounts
+                        key=f"session_grid_{db_mtime}_{len(session_summary)}_{session_summary['_start'].iat[0]}",
                     )
-                    try:
-                        grid_table = grid["data"]  # trigger autosize in frontend
-                    except Exception:
-                        pass
 
                     sel = grid.get("selected_rows", [])
-                    row_dict = None
                     if sel:
                         # `sel[0]['_selectedRowNodeInfo']['nodeRowIndex']` is provided by st-aggrid
                         idx = sel[0].get("_selectedRowNodeInfo", {}).get("nodeRowIndex")
-                        if idx is None:
-                            # fallback to first row if index not present
-                            row_dict = tbl_full.iloc[0].to_dict()
-                        else:
-                            row_dict = tbl_full.iloc[int(idx)].to_dict()
-
-                    if row_dict is not None:
-                        start_pad = pd.to_datetime(row_dict.get("_start")) - pd.Timedelta(minutes=10)
-                        end_pad = pd.to_datetime(row_dict.get("_end")) + pd.Timedelta(minutes=10)
-                        x_range_override = (start_pad, end_pad)
-                        txn_filter = str(row_dict.get("Transaction ID"))
+                        pos = 0 if idx is None else int(idx)  # fallback to first row if index not present
+                        x_range_override = zoom_range(session_summary["_start"].iat[pos], session_summary["_end"].iat[pos])
+                        txn_filter = str(session_summary["Transaction ID"].iat[pos])
                 else:
                     # Fallback: checkbox-in-table + button
-                    tbl = session_summary[[
+                    display_editor = session_summary[[
                         "Date/Time (AKDT)", "Stop Time (AKDT)", "Location",
                         "Connector #", "Connector Type", "Max Power kW", "Energy kWh", "Duration (min)",
                         "SoC Start", "SoC End", "ID Tag", "Transaction ID",
-                        "_start", "_end"
-                    ]].copy()
-                    tbl = tbl.sort_values("_start", ascending=False, kind="mergesort")
-                    tbl.insert(0, "Zoom", False)
-                    display_editor = tbl.drop(columns=["_start", "_end"], errors="ignore")
+                    ]]  # already newest -> oldest; row labels match session_summary for the zoom lookups
+                    display_editor.insert(0, "Zoom", False)
                     edited = st.data_editor(
                         display_editor,
                         hide_index=True,
@@ -1668,19 +2265,20 @@ with tabs[0]:
                         if st.button("🔍 Zoom to selected", key="zoom_selected"):
                             if sel_rows:
                                 i = sel_rows[0]
-                                row = tbl.loc[i]
-                                start_pad = pd.to_datetime(row["_start"], errors="coerce") - pd.Timedelta(minutes=10)
-                                end_pad = pd.to_datetime(row["_end"], errors="coerce") + pd.Timedelta(minutes=10)
-                                x_range_override = (start_pad, end_pad)
-                                txn_filter = str(row["Transaction ID"])
+                                x_range_override = zoom_range(session_summary.at[i, "_start"], session_summary.at[i, "_end"])
+                                txn_filter = str(session_summary.at[i, "Transaction ID"])
                             else:
                                 st.warning("Check one row first.")
                     with cols_zoom[1]:
                         with st.expander("Or pick a single session from a list"):
-                            _ordered = session_summary.sort_values("_start", ascending=False, kind="mergesort")
                             sel_label_map = {
-                                f"{r['Date/Time (AKDT)']} — {r['Location']} — {r['Transaction ID']}": i
-                                for i, r in _ordered.iterrows()
+                                f"{d} — {loc} — {t}": i
+                                for d, loc, t, i in zip(
+                                    session_summary["Date/Time (AKDT)"].to_numpy(),
+                                    session_summary["Location"].to_numpy(),
+                                    session_summary["Transaction ID"].to_numpy(),
+                                    session_summary.index,
+                                )
                             }
                             sel_key = st.selectbox(
                                 "Select a session to zoom",
@@ -1690,17 +2288,15 @@ with tabs[0]:
 
                             if sel_key and st.button("🔎 Zoom..."):
                                 i = sel_label_map[sel_key]
-                                row = session_summary.loc[i]
-                                start_pad = pd.to_datetime(row["_start"]) - pd.Timedelta(minutes=10)
-                                end_pad = pd.to_datetime(row["_end"]) + pd.Timedelta(minutes=10)
-                                x_range_override = (start_pad, end_pad)
-                                txn_filter = str(row["Transaction ID"])
+                                x_range_override = zoom_range(session_summary.at[i, "_start"], session_summary.at[i, "_end"])
+                                txn_filter = str(session_summary.at[i, "Transaction ID"])
             
             # ---------- Interactive Plot (Time Series) ----------
-            plot_src = mdf.copy()
+            # Read-only below, so no copy; a selected session is a boolean-mask subset of mdf
+            plot_src = mdf
             sess_col = next((c for c in ["transaction_id", "session_id", "session"] if c in plot_src.columns), None)
             if sess_col and txn_filter:
-                plot_src = plot_src[plot_src[sess_col].astype(str) == str(txn_filter)]
+                plot_src = plot_src[session_mask(plot_src[sess_col], txn_filter)]
 
             # Metric mapping
             metric_map = {}
@@ -1733,10 +2329,17 @@ with tabs[0]:
                 default_y = list(metric_map.keys())
                 y_choices = st.multiselect("Y-axis fields", options=list(metric_map.keys()), default=default_y)
                 if y_choices:
-                    plot_df = pd.DataFrame({"Time": plot_src.get("AKDT_dt", pd.to_datetime(plot_src["AKDT"], errors="coerce"))})
-                    for label in y_choices:
-                        col, scale, rnd = metric_map[label]
-                        plot_df[label] = (pd.to_numeric(plot_src[col], errors="coerce") * scale).round(rnd)
+                    plot_df = build_plot_df(
+                        plot_src, tuple((label, *metric_map[label]) for label in y_choices),
+                        db_path, start_utc_iso, end_utc_iso, tuple(sorted(evse_ids_set)), bool(fleet_only),
+                        txn_filter, db_mtime,
+                    )
+                    # Plotly turns tz-aware x into wall-clock datetime64 separately for every trace;
+                    # do that once and hand the same array to each metric (same JSON either way)
+                    x_time = plot_df["Time"]
+                    if isinstance(x_time.dtype, pd.DatetimeTZDtype):
+                        x_time = x_time.dt.tz_localize(None)
+                    x_time = x_time.to_numpy()
                     # Layout toggle
                     layout_choice = st.radio(
                         "Chart layout",
@@ -1749,7 +2352,7 @@ with tabs[0]:
                     if layout_choice == "Single pane (multi-axis)":
                         # Build a multi-axis figure where each selected metric gets its own y-axis.
                         # Axes alternate sides (left/right) after the first axis and include readable tick scales.
-                        fig = go.Figure()
+                        fig = maybe_resampler(go.Figure(), len(plot_df))
 
                         # Determine counts for alternating axes
                         n_metrics = len(y_choices)
@@ -1800,14 +2403,15 @@ with tabs[0]:
                                 # First metric uses the default LEFT axis: trace.yaxis="y", layout key "yaxis"
                                 trace_axis_name = "y"
                                 layout_axis_key = "yaxis"
-                                fig.add_trace(
-                                    go.Scatter(
-                                        x=plot_df["Time"],
-                                        y=yvals,
+                                add_line_trace(
+                                    fig,
+                                    go.Scattergl(
                                         name=label,
                                         mode="lines",
                                         hovertemplate=f"{label}: %{{y:.{rnd}f}}<extra></extra>",
-                                    )
+                                    ),
+                                    x_time,
+                                    yvals,
                                 )
                                 fig.update_layout(
                                     **{
@@ -1834,15 +2438,16 @@ with tabs[0]:
                                 trace_axis_name = f"y{idx}"
                                 layout_axis_key = f"yaxis{idx}"
 
-                                fig.add_trace(
-                                    go.Scatter(
-                                        x=plot_df["Time"],
-                                        y=yvals,
+                                add_line_trace(
+                                    fig,
+                                    go.Scattergl(
                                         name=label,
                                         mode="lines",
                                         yaxis=trace_axis_name,
                                         hovertemplate=f"{label}: %{{y:.{rnd}f}}<extra></extra>",
-                                    )
+                                    ),
+                                    x_time,
+                                    yvals,
                                 )
 
                                 # Decide side and position
@@ -1885,10 +2490,16 @@ with tabs[0]:
                     else:
                         # One subplot per metric with its own y-axis/title
                         rows = len(y_choices)
-                        fig = make_subplots(rows=rows, cols=1, shared_xaxes=True, vertical_spacing=0.05)
+                        fig = maybe_resampler(
+                            make_subplots(rows=rows, cols=1, shared_xaxes=True, vertical_spacing=0.05),
+                            len(plot_df),
+                        )
                         for i, label in enumerate(y_choices, start=1):
-                            fig.add_trace(
-                                go.Scatter(x=plot_df["Time"], y=plot_df[label], name=label, mode="lines"),
+                            add_line_trace(
+                                fig,
+                                go.Scattergl(name=label, mode="lines"),
+                                x_time,
+                                plot_df[label],
                                 row=i, col=1
                             )
                             fig.update_yaxes(title_text=label, row=i, col=1)
@@ -1904,33 +2515,38 @@ with tabs[0]:
             st.subheader("Session Start Density (by Day & Hour)")
             if session_summary is not None and not session_summary.empty:
                 # We need the true start times and per-session duration
-                starts = pd.to_datetime(session_summary["_start"], errors="coerce").dropna()
+                starts = session_summary["_start"]
+                if not pd.api.types.is_datetime64_any_dtype(starts):
+                    starts = pd.to_datetime(starts, errors="coerce", utc=True, cache=True)
+                starts = starts.dropna()  # build_session_summary already yields datetime64 _start; no re-parse
                 durs = pd.to_numeric(session_summary.get("Duration (min)"), errors="coerce")
 
                 if not starts.empty:
-                    # Build base frame for day/hour
-                    base = pd.DataFrame({
-                        "dow": starts.dt.dayofweek,  # Monday=0 .. Sunday=6
-                        "hour": starts.dt.hour,
-                        "dur": durs.values if durs is not None and len(durs) == len(starts) else np.nan,
-                    })
+                    # Day/hour/duration arrays for the bincount grids
+                    dow_arr = starts.dt.dayofweek.to_numpy(dtype="int64")  # Monday=0 .. Sunday=6
+                    hour_arr = starts.dt.hour.to_numpy(dtype="int64")
+                    if durs is not None and len(durs) == len(starts):
+                        dur_arr = durs.to_numpy(dtype="float64")
+                    else:
+                        dur_arr = np.full(len(starts), np.nan)
 
                     # Week order: Sun → Sat (pandas dayofweek is Mon=0..Sun=6)
                     day_labels = ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
                     order_idx = [6, 0, 1, 2, 3, 4, 5]  # reorder rows to start with Sunday
 
+                    # Flat 7x24 cell index (dow*24 + hour) shared by both heatmaps
+                    cell = dow_arr * 24 + hour_arr
+
                     # --- Heatmap 1: Count per day/hour (blue) ---
-                    ct1 = pd.crosstab(base["dow"], base["hour"]).reindex(range(7), fill_value=0)
-                    ct1 = ct1.loc[order_idx]  # Sun-first
-                    ct1 = ct1.reindex(columns=range(24), fill_value=0)
-                    ct1.index = day_labels
+                    counts1 = np.bincount(cell, minlength=168).reshape(7, 24)
+                    ct1 = pd.DataFrame(counts1[order_idx], index=day_labels, columns=range(24))  # Sun-first
 
                     z1 = ct1.values.astype(float)
                     z1_max = float(np.nanmax(z1)) if z1.size else 0.0
 
                     # Inline labels (blank for zeros)
                     _vals1 = ct1.values.astype("int64")
-                    _text1 = np.where(_vals1 == 0, "", _vals1.astype(str))
+                    _text1 = count_labels(_vals1)
 
                     fig_hm1 = go.Figure(
                         data=go.Heatmap(
@@ -1965,19 +2581,18 @@ with tabs[0]:
                     st.markdown("<br><br>", unsafe_allow_html=True)
 
                     # --- Heatmap 2: Average duration (minutes) per day/hour (red) ---
-                    grp = base.groupby(["dow", "hour"], dropna=False)["dur"].mean()
-                    grid = (
-                        grp.unstack(level=1)
-                           .reindex(index=range(7), columns=range(24))
-                    )
-                    ct2 = grid.loc[order_idx].fillna(0.0)
-                    ct2.index = day_labels
+                    # Mean over the fixed 7x24 grid via bincount (cells without a duration -> 0)
+                    has_dur = ~np.isnan(dur_arr)
+                    sums = np.bincount(cell[has_dur], weights=dur_arr[has_dur], minlength=168)
+                    counts = np.bincount(cell[has_dur], minlength=168)
+                    grid = np.divide(sums, counts, out=np.zeros(168), where=counts > 0).reshape(7, 24)
+                    ct2 = pd.DataFrame(grid[order_idx], index=day_labels, columns=range(24))
 
                     z2 = ct2.values.astype(float)
                     z2_max = float(np.nanmax(z2)) if z2.size else 0.0
 
                     # Inline text: one decimal when >0, blank when 0
-                    _text2 = np.where(z2 <= 0.0, "", np.round(z2, 1).astype(str))
+                    _text2 = tenths_labels(z2)
 
                     fig_hm2 = go.Figure(
                         data=go.Heatmap(
@@ -2027,7 +2642,7 @@ with tabs[1]:
         show_only_vendor = st.checkbox("Show only vendor_error_code", value=False)
 
     # what status table do we have?
-    avail = table_list(db_path, _db_mtime(db_path))
+    avail = avail_tables
     status_table = (
         "realtime_status_notifications"
         if "realtime_status_notifications" in avail
@@ -2044,7 +2659,8 @@ with tabs[1]:
             start_utc_iso,
             end_utc_iso,
             None,
-            _db_mtime(db_path),
+            db_mtime,
+            cols=("id", "timestamp", "station_id", "connector_id", "status", "error_code", "vendor_error_code"),
         )
 
         if status_df.empty:
@@ -2060,49 +2676,38 @@ with tabs[1]:
                 status_df = fallback.copy()
                 status_df = add_akdt(status_df, "timestamp")
                 status_df = add_evse_name_col(status_df, "station_id")
+                # Sidebar EVSE filter AND (optional) only rows that actually have a vendor_error_code, as one mask
+                mask = np.ones(len(status_df), dtype=bool)
                 if "selected_evse_ids" in locals() and selected_evse_ids:
                     wanted = {str(x) for x in selected_evse_ids}
-                    status_df = status_df[status_df["station_id"].astype(str).isin(wanted)]
-                # optional: only rows that actually have a vendor_error_code
+                    mask &= station_in(status_df["station_id"], wanted).to_numpy()
                 if show_only_vendor and "vendor_error_code" in status_df.columns:
                     v = status_df["vendor_error_code"].astype(str).str.strip()
-                    mask = (v != "") & (v.str.lower() != "none") & (v != "0")
+                    mask &= ((v != "") & (v.str.lower() != "none") & (v != "0")).to_numpy()
+                if not mask.all():
                     status_df = status_df[mask]
-                # ... after enrichment / sorting ...
-                if show_only_vendor:
-                    if "vendor_error_code" in status_df.columns:
-                        v = status_df["vendor_error_code"].astype(str).str.strip()
-                        mask = (v != "") & (v.str.lower() != "none") & (v != "0")
-                        status_df = status_df[mask]
                 # newest → oldest
                 if "AKDT_dt" in status_df.columns:
                     status_df = status_df.sort_values("AKDT_dt", ascending=False, kind="mergesort")
                 else:
+                    # ISO8601 understands a trailing "Z" natively (same parse as add_akdt)
                     ts = pd.to_datetime(
-                        status_df["timestamp"].astype(str).str.replace("Z", "+00:00", regex=False),
-                        utc=True,
-                        errors="coerce",
+                        status_df["timestamp"], utc=True, errors="coerce", format="ISO8601"
                     ).dt.tz_convert(AK)
                     status_df = status_df.assign(AKDT_dt=ts).sort_values("AKDT_dt", ascending=False, kind="mergesort")
                 # Tritium enrichment
                 try:
-                    codes_df = get_error_codes_df(db_path, _db_mtime(db_path))  # platform, code, impact, description
+                    codes_df = error_code_lookup(db_path, db_mtime)  # (Platform, code_key) -> impact, description
                     if not codes_df.empty:
-                        codes_df = codes_df.rename(
-                            columns={"platform": "Platform", "code": "code_key"}
-                        ).copy()
                         base = status_df.copy()
-                        base["Platform"] = base.get("EVSE", base.get("station_id", "")).map(PLATFORM_MAP).fillna("")
+                        base["Platform"] = platform_series(base.get("EVSE", base.get("station_id", "")))
                         if "vendor_error_code" in base.columns:
-                            v = base["vendor_error_code"].astype(str)
-                            base["code_key"] = v.str.extract(r"(\d+)", expand=False).fillna("")
+                            base["code_key"] = vendor_code_keys(base["vendor_error_code"])
                         else:
                             base["code_key"] = ""
-                        base = base.merge(
-                            codes_df[["Platform", "code_key", "impact", "description"]],
-                            on=["Platform", "code_key"],
-                            how="left",
-                        )
+                        base = base.join(
+                            codes_df, on=["Platform", "code_key"], how="left", validate="many_to_one"
+                        ).reset_index(drop=True)
                         status_df = base
                 except Exception:
                     pass
@@ -2128,8 +2733,10 @@ with tabs[1]:
                     AgGrid(
                         display_df[final_cols],
                         gridOptions=gob.build(),
-                        fit_columns_on_grid_load=True,
                         height=340,
+                        # Read-only table: no selection/edit round trips; flex columns already fill the width
+                        update_mode=GridUpdateMode.NO_UPDATE,
+                        key=f"status_grid_{db_mtime}_{start_utc_iso}_{end_utc_iso}_{len(display_df)}",
                     )
                 else:
                     st.dataframe(display_df[final_cols], use_container_width=True)
@@ -2140,33 +2747,25 @@ with tabs[1]:
             status_df = add_akdt(status_df, "timestamp")
             status_df = add_evse_name_col(status_df, "station_id")
 
-            # apply EVSE filter from sidebar, if any
+            # EVSE filter from sidebar, if any, AND (optional) only rows that actually have a
+            # vendor_error_code -- combined into one mask so the frame is sliced once
+            mask = np.ones(len(status_df), dtype=bool)
             if "selected_evse_ids" in locals() and selected_evse_ids:
                 wanted = {str(x) for x in selected_evse_ids}
-                status_df = status_df[status_df["station_id"].astype(str).isin(wanted)]
-
-            # optional: only rows that actually have a vendor_error_code
+                mask &= station_in(status_df["station_id"], wanted).to_numpy()
             if show_only_vendor and "vendor_error_code" in status_df.columns:
                 v = status_df["vendor_error_code"].astype(str).str.strip()
-                mask = (v != "") & (v.str.lower() != "none") & (v != "0")
+                mask &= ((v != "") & (v.str.lower() != "none") & (v != "0")).to_numpy()
+            if not mask.all():
                 status_df = status_df[mask]
 
-            # ... after enrichment / sorting ...
-            if show_only_vendor:
-                if "vendor_error_code" in status_df.columns:
-                    v = status_df["vendor_error_code"].astype(str).str.strip()
-                    # keep rows that actually have a vendor code
-                    mask = (v != "") & (v.str.lower() != "none") & (v != "0")
-                    status_df = status_df[mask]
-
             # newest → oldest
             if "AKDT_dt" in status_df.columns:
                 status_df = status_df.sort_values("AKDT_dt", ascending=False, kind="mergesort")
             else:
+                # ISO8601 understands a trailing "Z" natively (same parse as add_akdt)
                 ts = pd.to_datetime(
-                    status_df["timestamp"].astype(str).str.replace("Z", "+00:00", regex=False),
-                    utc=True,
-                    errors="coerce",
+                    status_df["timestamp"], utc=True, errors="coerce", format="ISO8601"
                 ).dt.tz_convert(AK)
                 status_df = status_df.assign(AKDT_dt=ts).sort_values("AKDT_dt", ascending=False, kind="mergesort")
 
@@ -2174,30 +2773,23 @@ with tabs[1]:
             # Tritium enrichment: use tritium_error_codes
             # ─────────────────────────────────────────────────────────────
             try:
-                codes_df = get_error_codes_df(db_path, _db_mtime(db_path))  # platform, code, impact, description
+                # cached per DB mtime, already renamed and indexed by (Platform, code_key)
+                codes_df = error_code_lookup(db_path, db_mtime)
                 if not codes_df.empty:
-                    # normalize code table
-                    codes_df = codes_df.rename(
-                        columns={"platform": "Platform", "code": "code_key"}
-                    ).copy()
-
                     base = status_df.copy()
                     # map EVSE → platform (RTM, RT50, …)
-                    base["Platform"] = base.get("EVSE", base.get("station_id", "")).map(PLATFORM_MAP).fillna("")
+                    base["Platform"] = platform_series(base.get("EVSE", base.get("station_id", "")))
 
                     # normalize vendor_error_code to just digits
                     if "vendor_error_code" in base.columns:
-                        v = base["vendor_error_code"].astype(str)
-                        base["code_key"] = v.str.extract(r"(\d+)", expand=False).fillna("")
+                        base["code_key"] = vendor_code_keys(base["vendor_error_code"])
                     else:
                         base["code_key"] = ""
 
-                    # join to codes
-                    base = base.merge(
-                        codes_df[["Platform", "code_key", "impact", "description"]],
-                        on=["Platform", "code_key"],
-                        how="left",
-                    )
+                    # join to codes (index lookup; at most one code row per status row)
+                    base = base.join(
+                        codes_df, on=["Platform", "code_key"], how="left", validate="many_to_one"
+                    ).reset_index(drop=True)
 
                     status_df = base
             except Exception:
@@ -2231,8 +2823,10 @@ with tabs[1]:
                 AgGrid(
                     display_df[final_cols],
                     gridOptions=gob.build(),
-                    fit_columns_on_grid_load=True,
                     height=340,
+                    # Read-only table: no selection/edit round trips; flex columns already fill the width
+                    update_mode=GridUpdateMode.NO_UPDATE,
+                    key=f"status_grid_{db_mtime}_{start_utc_iso}_{end_utc_iso}_{len(display_df)}",
                 )
             else:
                 st.dataframe(display_df[final_cols], use_container_width=True)
@@ -2245,17 +2839,17 @@ with tabs[2]:
     st.markdown('<span class="rca-badge">sorted newest first</span>', unsafe_allow_html=True)
 
     # Load events defensively
-    conn_df = load_connectivity_events(db_path, start_utc_iso, end_utc_iso, _db_mtime(db_path))
+    conn_df = load_connectivity_events(db_path, start_utc_iso, end_utc_iso, db_mtime)
     if conn_df.empty:
         st.info("No websocket CONNECT/DISCONNECT events found in this window.")
         connectivity_view = pd.DataFrame()
     else:
         # EVSE + time columns, then filter
         conn_df = ensure_evse_and_time(conn_df)
-        if 'evse_ids_set' in locals() and len(evse_ids_set) > 0:
-            conn_df = conn_df[conn_df["station_id"].astype(str).isin(evse_ids_set)]
-        if fleet_only:
-            conn_df = conn_df[conn_df["station_id"].astype(str).isin(FLEET_IDS)]
+        id_sets = ([evse_ids_set] if 'evse_ids_set' in locals() and len(evse_ids_set) > 0 else []) \
+            + ([FLEET_IDS] if fleet_only else [])
+        if id_sets:
+            conn_df = conn_df[station_in(conn_df["station_id"], *id_sets)]
 
         if conn_df.empty:
             st.info("No websocket events after filters.")
@@ -2267,36 +2861,38 @@ with tabs[2]:
             # If sequence has CONNECT followed by CONNECT (no prior DISCONNECT), duration = NaN
             conn_df = conn_df.sort_values(["station_id", "ts_utc"], kind="mergesort")
 
-            def _duration_since_prev_disconnect(group: pd.DataFrame) -> pd.Series:
-                g = group.copy()
-                ts = g["ts_utc"]
-                evt = g["Connectivity"].astype(str).str.upper()
-                prev_ts = ts.shift(1)
-                prev_evt = evt.shift(1)
-                dur_min = np.where(
-                    evt.str.contains("CONNECT") & prev_evt.str.contains("DISCONNECT"),
-                    (ts - prev_ts).dt.total_seconds() / 60.0,
-                    np.nan,
-                )
-                return pd.Series(dur_min, index=g.index, dtype="float")
+            # Rows are grouped by station, so "previous row of the same EVSE" is a global shift
+            # masked where the station changes (NaN station ids never pair, as groupby drops them)
+            evt = conn_df["Connectivity"].cat.codes.to_numpy()  # CONNECTIVITY_EVENTS codes
+            is_connect = evt >= 0  # any event (a DISCONNECT label also contains "CONNECT")
+            is_disconnect = evt == 1
+            if NUMBA_AVAILABLE:
+                # One linear pass over int arrays
+                station = pd.factorize(conn_df["station_id"])[0]
+                ts_ns = conn_df["ts_utc"].dt.tz_localize(None).to_numpy(dtype="datetime64[ns]").view("int64")
+                dur = np.empty(len(conn_df), dtype="float64")
+                _reconnect_gaps(station, is_connect, is_disconnect, ts_ns, dur)
+                conn_df["Duration_min"] = dur
+            else:
+                sid = conn_df["station_id"].to_numpy()
+                pair = np.zeros(len(conn_df), dtype=bool)
+                pair[1:] = (sid[1:] == sid[:-1]) & pd.notna(sid[1:]) & is_connect[1:] & is_disconnect[:-1]
+                gap_min = (conn_df["ts_utc"].diff().dt.total_seconds() / 60.0).to_numpy()
+                conn_df["Duration_min"] = np.where(pair, gap_min, np.nan)
 
-            conn_df["Duration_min"] = conn_df.groupby("station_id", group_keys=False).apply(_duration_since_prev_disconnect)
-
-            # Build display frame
-            try:
-                display_dt = conn_df["AKDT_dt"].dt.tz_convert(AK).dt.strftime("%-m/%-d/%y %H:%M:%S")
-            except Exception:
-                display_dt = conn_df["AKDT_dt"].dt.tz_convert(AK).dt.strftime("%m/%d/%y %H:%M:%S")
+            # Build display frame. AKDT_dt is already Anchorage tz (add_akdt), so one tz_localize
+            # gives the naive wall-clock that both the display strings and the Excel export use.
+            ak_naive = conn_df["AKDT_dt"].dt.tz_localize(None)
 
             connectivity_view = pd.DataFrame({
-                "Date/Time (AKDT)": display_dt,
+                "Date/Time (AKDT)": short_local_strings(ak_naive),
                 "EVSE": conn_df["EVSE"],
                 "Connectivity": conn_df["Connectivity"],
                 "Duration": conn_df["Duration_min"].round(2),
-                "_akdt_dt": conn_df["AKDT_dt"],
-            }).sort_values("_akdt_dt", ascending=False, kind="mergesort")
+                "_akdt_naive": ak_naive,
+            }).sort_values("_akdt_naive", ascending=False, kind="mergesort")
             # Render
-            st.dataframe(connectivity_view.drop(columns=["_akdt_dt"], errors="ignore"), use_container_width=True)
+            st.dataframe(connectivity_view.drop(columns=["_akdt_naive"], errors="ignore"), use_container_width=True)
 
 # ============================================================================ #
 # 5) Data Export Tab - CORRECTED BLOCK (Fixing NameErrors and Excel Date Format)
@@ -2309,8 +2905,6 @@ with tabs[3]:
     if exp_summary is None or (isinstance(exp_summary, pd.DataFrame) and exp_summary.empty):
         st.info("No prepared session summary found. Visit the 'Charging Sessions' tab once for this window, then return here to export.")
         st.stop()
-    # Work on a copy so we don't mutate session state
-    session_summary = exp_summary.copy()
     _exp_ctx = st.session_state.get("export_context", {})
     if _exp_ctx:
         st.caption(f"Export window: {_exp_ctx.get('start','')} → {_exp_ctx.get('end','')} | mtime={_exp_ctx.get('db_mtime','')}")
@@ -2323,17 +2917,19 @@ with tabs[3]:
 
     # --- DataFrames for Export ---
     
-    # 1. Prepare Main Data (df)
-    df_main_export = strip_tz_for_excel(df.copy())
+    # 1. Main Data (df) is tz-stripped inside build_export_xlsx, only on a cache miss
     
     # 2. Prepare Summary Data (session_summary)
     # Use the native datetime columns (_start, _end) and rename them for the sheet
     # Build the Summary export from the prepared session_summary (already newest→oldest upstream),
-    # then re-enforce sorting here in case the user changed the view.
-    _df_sum = session_summary.copy()
-
-    # Hard sort by the real datetime so newest is on top in the sheet
-    if "_start" in _df_sum.columns:
+    # then re-enforce sorting here in case the user changed the view. Every step below returns a
+    # new frame (sort/select/assign), so the session_state copy is never mutated and needs no .copy().
+    _df_sum = exp_summary
+
+    # Hard sort by the real datetime so newest is on top in the sheet; upstream normally
+    # already delivers it newest-first, so a single monotonic pass lets us skip the sort.
+    # (NaT makes is_monotonic_decreasing False, so frames with NaT still get sorted.)
+    if "_start" in _df_sum.columns and not _df_sum["_start"].is_monotonic_decreasing:
         _df_sum = _df_sum.sort_values("_start", ascending=False, kind="mergesort")
 
     # Construct the export frame (defensive: some cols may not exist)
@@ -2343,16 +2939,15 @@ with tabs[3]:
         "SoC Start", "SoC End", "ID Tag", "_start", "_end",
     ]
     present_cols = [c for c in desired_cols if c in _df_sum.columns]
-    df_summary_export = _df_sum[present_cols].copy()
+    df_summary_export = _df_sum[present_cols]
 
     # Force Anchorage local time for the two display columns regardless of source tz
+    ak_cols = {}
     if "_start" in df_summary_export.columns:
-        df_summary_export["Date/Time (AKDT)"] = to_ak_naive(df_summary_export["_start"])
+        ak_cols["Date/Time (AKDT)"] = to_ak_naive(df_summary_export["_start"])
     if "_end" in df_summary_export.columns:
-        df_summary_export["Stop Time (AKDT)"] = to_ak_naive(df_summary_export["_end"])
-
-    # Strip tz info from any leftover tz-aware columns
-    df_summary_export = strip_tz_for_excel(df_summary_export)
+        ak_cols["Stop Time (AKDT)"] = to_ak_naive(df_summary_export["_end"])
+    df_summary_export = df_summary_export.assign(**ak_cols)
 
     # Final column order for Excel (and drop the helper columns)
     _df_cols_final = [
@@ -2364,7 +2959,7 @@ with tabs[3]:
     df_summary_export = df_summary_export[[c for c in _df_cols_final if c in df_summary_export.columns]]
 
     # 3. Prepare Status Data (status_df)
-    df_status_export = status_df.copy()
+    df_status_export = status_df
     # Remove duplicated column names to avoid pandas indexing errors during assignment
     if not df_status_export.empty:
         # If a previous string-formatted column exists, drop it safely
@@ -2372,98 +2967,41 @@ with tabs[3]:
             # also collapse duplicate names, if any
             df_status_export = df_status_export.loc[:, ~df_status_export.columns.duplicated()]
             df_status_export = df_status_export.drop(columns=["Date/Time (AKDT)"], errors="ignore")
-        # Prefer native datetime for Excel; keep tz for now and strip later
+        # Native AK wall-clock datetime for Excel (add_akdt already converted AKDT_dt once)
         if "AKDT_dt" in df_status_export.columns:
-            df_status_export["Date/Time (AKDT)"] = df_status_export["AKDT_dt"]
-        # Strip timezone info for Excel export compatibility
-        df_status_export = strip_tz_for_excel(df_status_export)
+            df_status_export = df_status_export.assign(**{"Date/Time (AKDT)": df_status_export["AKDT_dt"].dt.tz_localize(None)})
     
     # 4. Prepare Auth Data 
     df_auth_export = pd.DataFrame()
     if not auth_df_display.empty:
-        df_auth_export = strip_tz_for_excel(auth_df_display.copy())
+        df_auth_export = auth_df_display
     
     # 5. Prepare Connectivity Data
     df_conn_export = pd.DataFrame()
     try:
         if 'connectivity_view' in locals() and isinstance(connectivity_view, pd.DataFrame) and not connectivity_view.empty:
-            tmp = connectivity_view.copy()
-            if "_akdt_dt" in tmp.columns:
-                tmp["Date/Time (AKDT)"] = to_ak_naive(tmp["_akdt_dt"])
-            df_conn_export = tmp[["Date/Time (AKDT)", "EVSE", "Connectivity", "Duration"]].copy()
+            tmp = connectivity_view
+            if "_akdt_naive" in tmp.columns:
+                # Naive AK wall-clock computed once in the Connectivity tab
+                tmp = tmp.assign(**{"Date/Time (AKDT)": tmp["_akdt_naive"]})
+            df_conn_export = tmp[["Date/Time (AKDT)", "EVSE", "Connectivity", "Duration"]]
     except Exception:
         df_conn_export = pd.DataFrame()
 
-    # --- Write to Excel ---
-    excel_buf = BytesIO()
-    with pd.ExcelWriter(excel_buf, engine=EXCEL_ENGINE) as writer:
-        # --- Write Summary FIRST ---
-        df_summary_export.to_excel(
-            writer,
-            sheet_name="Summary",
-            index=False,
-            columns=[c for c in df_summary_export.columns if not c.startswith("_")]
-        )
-        # Then Main Data
-        df_main_export.to_excel(writer, sheet_name="Main Data", index=False)
-        # Build Status export with selected/renamed columns
-        status_selected = pd.DataFrame()
-        if not df_status_export.empty:
-            # Ensure a native datetime for Date/Time (AKDT)
-            if "AKDT_dt" in df_status_export.columns:
-                df_status_export["Date/Time (AKDT)"] = df_status_export["AKDT_dt"]
-            status_cols = [
-                ("Date/Time (AKDT)", "Date/Time (AKDT)"),
-                ("EVSE", "EVSE"),
-                ("status", "Status"),
-                ("error_code", "Error_Code"),
-                ("vendor_error_code", "Vendor Error Code"),
-                ("connector_id", "Connector_id"),
-                ("id", "ID"),
-                ("impact", "Impact"),
-                ("description", "Description"),
-            ]
-            keep_cols = [c for c, _ in status_cols if c in df_status_export.columns]
-            status_selected = df_status_export[keep_cols].rename(columns=dict(status_cols))
-            status_selected = strip_tz_for_excel(status_selected)
-            status_selected.to_excel(writer, sheet_name="Status", index=False)
-        # Auth (optional)
-        if not df_auth_export.empty:
-            df_auth_export.to_excel(writer, sheet_name="Auth", index=False)
-
-        # Connectivity (optional)
-        if not df_conn_export.empty:
-            df_conn_export.to_excel(writer, sheet_name="Connectivity", index=False)
+    include_main = st.checkbox(
+        "Include Main Data sheet in the xlsx (slow for long windows; also available as Parquet below)",
+        value=True,
+        key="export_include_main",
+    )
 
-        # --- Formatting (xlsxwriter only) ---
-        try:
-            if EXCEL_ENGINE == "xlsxwriter":
-                workbook = writer.book
-                date_fmt = workbook.add_format({"num_format": "m/d/yy hh:mm:ss"})
-                # Summary A, B are datetimes
-                if "Summary" in writer.sheets:
-                    ws = writer.sheets["Summary"]
-                    ws.set_column("A:A", 20, date_fmt)
-                    ws.set_column("B:B", 20, date_fmt)
-                    num2_fmt = workbook.add_format({"num_format": "0.00"})
-                    # Start SoC (I) and End SoC (J) as numeric with 2 decimals
-                    ws.set_column("I:J", 12, num2_fmt)
-                # Status A is datetime
-                if "Status" in writer.sheets:
-                    ws = writer.sheets["Status"]
-                    ws.set_column("A:A", 20, date_fmt)
-                # Connectivity A is datetime; Duration (D) uses 2 decimals
-                if "Connectivity" in writer.sheets:
-                    ws = writer.sheets["Connectivity"]
-                    ws.set_column("A:A", 20, date_fmt)
-                    num2_fmt = workbook.add_format({"num_format": "0.00"})
-                    ws.set_column("D:D", 12, num2_fmt)
-        except Exception:
-            pass
+    # --- Write to Excel ---
+    excel_bytes = build_export_xlsx(
+        df_summary_export, df, df_status_export, df_auth_export, df_conn_export,
+        db_path, start_utc_iso, end_utc_iso, tuple(sorted(evse_ids_set)), bool(fleet_only),
+        bool(locals().get("show_only_vendor", False)), db_mtime, EXCEL_ENGINE, bool(include_main),
+    )
 
     # ---- Download button for Excel export ----
-    excel_buf.seek(0)
-    excel_bytes = excel_buf.getvalue()
     export_fname = f"RCA_export_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}.xlsx"
 
     st.download_button(
@@ -2472,5 +3010,25 @@ with tabs[3]:
         file_name=export_fname,
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         use_container_width=False,
-        key=f"export_all_xlsx_{abs(hash((start_utc_iso, end_utc_iso, evse_id or '(all)', bool(fleet_only)))) % 10**8}",
-    )
\ No newline at end of file
+        # Stable across processes (builtin hash() is salted per interpreter)
+        key="export_all_xlsx_" + hashlib.blake2b(
+            repr((db_mtime, start_utc_iso, end_utc_iso, tuple(sorted(evse_ids_set)), bool(fleet_only))).encode(),
+            digest_size=8,
+        ).hexdigest(),
+    )
+
+    # ---- Main Data as Parquet (optional: needs pyarrow) ----
+    if PARQUET_AVAILABLE and df is not None and not df.empty:
+        try:
+            main_parquet = build_main_parquet(
+                df, db_path, start_utc_iso, end_utc_iso, tuple(sorted(evse_ids_set)), bool(fleet_only), db_mtime,
+            )
+            st.download_button(
+                label="Main Data (parquet)",
+                data=main_parquet,
+                file_name=export_fname.replace("RCA_export_", "RCA_main_").replace(".xlsx", ".parquet"),
+                mime="application/octet-stream",
+                use_container_width=False,
+            )
+        except Exception as e:
+            st.caption(f"Parquet export unavailable for this data: {e}")